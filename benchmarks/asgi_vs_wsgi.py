@@ -0,0 +1,154 @@
+"""
+Load test: sync gunicorn worker (wsgi.py) vs one uvicorn worker (asgi.py).
+
+    $ python benchmarks/asgi_vs_wsgi.py --concurrency 50 --seconds 5
+
+Starts each server with ONE worker on a throw-away SQLite file (or --db-url),
+sends the PATHS below from --concurrency client threads and prints requests/s
+and latency per mode. /api/health and /api/tasks?status=pending are answered
+natively async under uvicorn; the publisher dashboard and the multi-get go
+through Flask in both modes (under uvicorn, one thread per request). A sync worker
+answers one request at a time, so extra clients just queue; the async worker
+keeps all of them in flight while they wait on the database. On a local
+SQLite file /api/tasks is CPU-bound (ORM + JSON) and both modes are close;
+the gap shows up with database latency: use --db-url with a Postgres over
+the network to see the I/O-bound case.
+"""
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC)
+
+MODES = {
+    "wsgi (gunicorn sync)": ["gunicorn", "wsgi:application", "--workers", "1",
+                             "--bind", "127.0.0.1:{port}", "--log-level", "warning"],
+    "asgi (uvicorn)": ["uvicorn", "asgi:application", "--workers", "1",
+                       "--host", "127.0.0.1", "--port", "{port}", "--log-level", "warning"],
+}
+PATHS = ["/api/health", "/api/tasks?status=pending",
+         # not handled by api/aio.py: Flask behind the ASGI adapter
+         "/api/users/1/tasks", "/api/tasks?ids=" + ",".join(str(i) for i in range(1, 51))]
+
+
+def seed(url, tasks):
+    os.environ["SQLALCHEMY_DATABASE_URI"] = url
+    from sqlalchemy import insert
+    from app import create_app
+    from api.models import db, User, Task
+
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(User(email="bench@example.com", username="bench", password="x"))
+        db.session.commit()
+        db.session.execute(insert(Task), [
+            {"title": f"task {i}", "description": "bench", "publisher_id": 1,
+             "status": "pending" if i % 2 else "completed"}
+            for i in range(tasks)])
+        db.session.commit()
+        db.engine.dispose()
+
+
+def wait_ready(port, proc, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/api/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+def load(port, path, concurrency, seconds):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def client():
+        nonlocal errors
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        mine = []
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            try:
+                conn.request("GET", path)
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except OSError:
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                ok = False
+            if ok:
+                mine.append(time.perf_counter() - start)
+            else:
+                with lock:
+                    errors += 1
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    latencies.sort()
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--db-url", default=None)
+    args = parser.parse_args()
+
+    tmp = None
+    url = args.db_url
+    if url is None:
+        tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        url = f"sqlite:///{tmp.name}"
+    seed(url, args.tasks)
+
+    # coalescing off: the async routes do not use it, both modes must do the same queries
+    env = dict(os.environ, SQLALCHEMY_DATABASE_URI=url, ADMIN_ENABLED="0", READ_COALESCING="0")
+    print(f"{args.concurrency} concurrent clients, {args.seconds:.0f}s per route, one worker per mode")
+    try:
+        for mode, command in MODES.items():
+            command = [part.format(port=args.port) for part in command]
+            proc = subprocess.Popen(command, cwd=SRC, env=env)
+            try:
+                wait_ready(args.port, proc)
+                for path in PATHS:
+                    latencies, errors = load(args.port, path, args.concurrency, args.seconds)
+                    n = len(latencies)
+                    p50 = latencies[n // 2] * 1000 if n else 0
+                    p99 = latencies[min(n - 1, int(n * 0.99))] * 1000 if n else 0
+                    print(f"{mode:22s} {path[:28]:28s} {n / args.seconds:8.0f} req/s  "
+                          f"p50 {p50:7.1f}ms  p99 {p99:7.1f}ms  errors {errors}")
+            finally:
+                proc.terminate()
+                proc.wait()
+    finally:
+        if tmp:
+            os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
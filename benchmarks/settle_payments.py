@@ -0,0 +1,74 @@
+"""
+Throughput benchmark for the batched payment settlement.
+
+    $ python benchmarks/settle_payments.py --count 100000 --batch-size 5000
+
+Runs against a throw-away SQLite file (or --db-url) so it never touches the
+project database. Goes through db.session in an app context, like
+"flask settle-payments": every batch also writes its change_events (and takes
+the advisory lock on Postgres).
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import insert, func, select  # noqa: E402
+
+from api.models import db, Payment, ChangeEvent  # noqa: E402
+from api.payments import settle_pending_payments, PENDING, SETTLED  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--db-url", default=None)
+    args = parser.parse_args()
+
+    tmp = None
+    url = args.db_url
+    if url is None:
+        tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        url = f"sqlite:///{tmp.name}"
+
+    os.environ["SQLALCHEMY_DATABASE_URI"] = url
+    os.environ.setdefault("ADMIN_ENABLED", "0")
+    from app import create_app
+    app = create_app()
+
+    with app.app_context():
+        tables = [Payment.__table__, ChangeEvent.__table__]
+        db.metadata.drop_all(db.engine, tables=tables)
+        db.metadata.create_all(db.engine, tables=tables)
+        session = db.session
+
+        start = time.perf_counter()
+        rows = [{"amount": 10, "status": PENDING, "dealed_id": i}
+                for i in range(1, args.count + 1)]
+        session.execute(insert(Payment), rows)
+        session.commit()
+        print(f"seeded {args.count} pending payments in {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        settled = settle_pending_payments(session, batch_size=args.batch_size)
+        elapsed = time.perf_counter() - start
+        left = session.execute(
+            select(func.count()).where(Payment.status != SETTLED)).scalar()
+        events = session.execute(select(func.count()).select_from(ChangeEvent)).scalar()
+        session.remove()
+        db.engine.dispose()
+
+    print(f"settled {settled} payments in {elapsed:.2f}s "
+          f"({settled / elapsed:,.0f} payments/s, batch size {args.batch_size}); "
+          f"not settled: {left}; change_events: {events}")
+
+    if tmp:
+        os.remove(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
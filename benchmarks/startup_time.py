@@ -0,0 +1,66 @@
+"""
+Cold-start benchmark: import + build of the WSGI app (what every gunicorn
+worker without --preload, CLI call or test module pays).
+
+    $ python benchmarks/startup_time.py --budget-ms 750
+
+Runs "python -X importtime -c 'import wsgi'" in fresh interpreters, prints the
+slowest imports and exits with status 1 when the median is over the budget.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def run_once():
+    env = dict(os.environ)
+    env.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite://")
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c", "import wsgi"],
+        cwd=SRC, env=env, capture_output=True, text=True, check=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    top_level = []
+    for line in proc.stderr.splitlines():
+        m = LINE.match(line)
+        # wsgi -> app -> direct imports of app.py (indent of 5 spaces)
+        if m and len(m.group(3)) <= 5:
+            top_level.append((int(m.group(2)) / 1000, m.group(4)))
+    return wall_ms, top_level
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=750)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    walls = []
+    top_level = []
+    for _ in range(args.runs):
+        wall_ms, top_level = run_once()
+        walls.append(wall_ms)
+
+    print("slowest imports (cumulative, last run):")
+    for ms, name in sorted(top_level, reverse=True)[:args.top]:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    median = statistics.median(walls)
+    print(f"interpreter + import wsgi: median {median:.0f} ms over {args.runs} runs "
+          f"(min {min(walls):.0f}, max {max(walls):.0f}), budget {args.budget_ms:.0f} ms")
+    if median > args.budget_ms:
+        print("OVER BUDGET")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Thundering-herd benchmark for request coalescing (api/coalesce.py).
+
+    $ python benchmarks/thundering_herd.py --threads 64 --tasks 20000
+
+Many threads hit the same cold GET /api/tasks?status=pending at once through
+the Flask test client, with READ_COALESCING on and off, and it counts how many
+times the task query reached the database. Runs against a throw-away SQLite
+file (or --db-url) so it never touches the project database.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import event, insert  # noqa: E402
+
+
+def run(app, db, url, threads):
+    from api.coalesce import task_reads
+    task_reads.clear()
+
+    task_queries = 0
+    lock = threading.Lock()
+
+    def count(conn, cursor, statement, *args):
+        nonlocal task_queries
+        if statement.lstrip().upper().startswith("SELECT") and "FROM task" in statement:
+            with lock:
+                task_queries += 1
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", count)
+
+    barrier = threading.Barrier(threads)
+    latencies = []
+
+    def worker():
+        client = app.test_client()
+        barrier.wait()
+        start = time.perf_counter()
+        response = client.get(url)
+        elapsed = time.perf_counter() - start
+        assert response.status_code == 200, response.status_code
+        with lock:
+            latencies.append(elapsed)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    wall = time.perf_counter() - start
+
+    event.remove(engine, "before_cursor_execute", count)
+    latencies.sort()
+    return task_queries, wall, latencies[len(latencies) // 2], latencies[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--tasks", type=int, default=20_000)
+    parser.add_argument("--db-url", default=None)
+    args = parser.parse_args()
+
+    tmp = None
+    url = args.db_url
+    if url is None:
+        tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        url = f"sqlite:///{tmp.name}"
+    os.environ["SQLALCHEMY_DATABASE_URI"] = url
+    os.environ["ADMIN_ENABLED"] = "0"
+
+    from app import create_app
+    from api.models import db, User, Task
+
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(User(email="bench@example.com", username="bench", password="x"))
+        db.session.commit()
+        db.session.execute(insert(Task), [
+            {"title": f"task {i}", "description": "bench", "publisher_id": 1,
+             "status": "pending" if i % 3 else "completed"}
+            for i in range(args.tasks)])
+        db.session.commit()
+
+    path = "/api/tasks?status=pending"
+    print(f"{args.threads} concurrent GET {path} ({args.tasks} tasks)")
+    for enabled in (False, True):
+        app.config["READ_COALESCING"] = enabled
+        queries, wall, p50, worst = run(app, db, path, args.threads)
+        label = "coalescing on " if enabled else "coalescing off"
+        print(f"{label}: {queries:3d} task queries, wall {wall:.2f}s, "
+              f"p50 {p50 * 1000:.0f}ms, max {worst * 1000:.0f}ms")
+
+    with app.app_context():
+        db.engine.dispose()
+    if tmp:
+        os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
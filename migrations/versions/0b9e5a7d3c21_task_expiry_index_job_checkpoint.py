@@ -0,0 +1,37 @@
+"""partial index on pending tasks by due_at and job_checkpoint table
+
+Revision ID: 0b9e5a7d3c21
+Revises: f1a6d9c40b7e
+Create Date: 2026-10-19 15:20:03.671248
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from api import online_schema
+
+
+# revision identifiers, used by Alembic.
+revision = '0b9e5a7d3c21'
+down_revision = 'f1a6d9c40b7e'
+branch_labels = None
+depends_on = None
+
+PENDING_WITH_DUE_DATE = "status = 'pending' AND due_at IS NOT NULL"
+
+
+def upgrade():
+    op.create_table('job_checkpoint',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('cursor', sa.Text(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    online_schema.create_index_concurrently('ix_task_pending_due_at', 'task', ['due_at', 'id'],
+                                            where=PENDING_WITH_DUE_DATE)
+
+
+def downgrade():
+    online_schema.drop_index_concurrently('ix_task_pending_due_at', 'task')
+
+    op.drop_table('job_checkpoint')
@@ -0,0 +1,30 @@
+"""task publisher/status/posted_at composite index
+
+Revision ID: 3b1f6c2a9e47
+Revises: d93ef08ef900
+Create Date: 2026-10-19 10:12:41.203114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from api import online_schema
+
+
+# revision identifiers, used by Alembic.
+revision = '3b1f6c2a9e47'
+down_revision = 'd93ef08ef900'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the composite index has publisher_id as leading column, so it
+    # replaces the single-column ix_task_publisher_id
+    online_schema.create_index_concurrently('ix_task_publisher_status_posted', 'task', ['publisher_id', 'status', 'posted_at'])
+    online_schema.drop_index_concurrently('ix_task_publisher_id', 'task')
+
+
+def downgrade():
+    online_schema.create_index_concurrently('ix_task_publisher_id', 'task', ['publisher_id'])
+    online_schema.drop_index_concurrently('ix_task_publisher_status_posted', 'task')
@@ -0,0 +1,32 @@
+"""change_events table (change-data-capture log)
+
+Revision ID: 5d2c8e1f7a94
+Revises: 0b9e5a7d3c21
+Create Date: 2026-10-19 16:02:41.518302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2c8e1f7a94'
+down_revision = '0b9e5a7d3c21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('change_events',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('entity', sa.String(length=30), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('op', sa.String(length=10), nullable=False),
+    sa.Column('data', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('change_events')
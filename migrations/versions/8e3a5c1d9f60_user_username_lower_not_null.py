@@ -0,0 +1,34 @@
+"""user.username_lower NOT NULL, after the username-lower backfill
+
+Revision ID: 8e3a5c1d9f60
+Revises: 5d2c8e1f7a94
+Create Date: 2026-10-19 17:21:05.337014
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from api import online_schema
+
+
+# revision identifiers, used by Alembic.
+revision = '8e3a5c1d9f60'
+down_revision = '5d2c8e1f7a94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # e5b7c3d82a16 already filled tables up to INLINE_BACKFILL_MAX_ROWS; a bigger
+    # one needs "flask backfill username-lower" before this migration
+    pending = op.get_bind().execute(
+        sa.text('SELECT count(*) FROM "user" WHERE username_lower IS NULL')).scalar()
+    if pending:
+        raise RuntimeError(
+            f"{pending} users without username_lower: run \"flask backfill username-lower\" first")
+    online_schema.set_not_null('user', 'username_lower', existing_type=sa.String(length=80))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('username_lower', existing_type=sa.String(length=80), nullable=True)
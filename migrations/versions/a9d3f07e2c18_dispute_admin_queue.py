@@ -0,0 +1,54 @@
+"""dispute admin queue: claim columns, queue index, admin_action fixes
+
+Revision ID: a9d3f07e2c18
+Revises: 7c4e2d91b5a3
+Create Date: 2026-10-19 12:21:09.734410
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d3f07e2c18'
+down_revision = '7c4e2d91b5a3'
+branch_labels = None
+depends_on = None
+
+# the unique constraint on admin_action.admin_user was created unnamed
+NAMING = {"uq": "uq_%(table_name)s_%(column_0_name)s"}
+
+
+def _admin_user_unique_name():
+    if op.get_bind().dialect.name == 'postgresql':
+        return 'admin_action_admin_user_key'
+    return 'uq_admin_action_admin_user'
+
+
+def upgrade():
+    with op.batch_alter_table('dispute', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('claimed_by', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.create_foreign_key('fk_dispute_claimed_by_user', 'user', ['claimed_by'], ['id'])
+        batch_op.create_index(batch_op.f('ix_dispute_claimed_by'), ['claimed_by'], unique=False)
+        batch_op.create_index('ix_dispute_status_created', ['status', 'created_at', 'id'], unique=False)
+
+    # an admin can take any number of actions
+    with op.batch_alter_table('admin_action', schema=None, naming_convention=NAMING) as batch_op:
+        batch_op.drop_constraint(_admin_user_unique_name(), type_='unique')
+        batch_op.create_index(batch_op.f('ix_admin_action_admin_user'), ['admin_user'], unique=False)
+        batch_op.create_index(batch_op.f('ix_admin_action_dispute_id'), ['dispute_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('admin_action', schema=None, naming_convention=NAMING) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_admin_action_dispute_id'))
+        batch_op.drop_index(batch_op.f('ix_admin_action_admin_user'))
+        batch_op.create_unique_constraint(_admin_user_unique_name(), ['admin_user'])
+
+    with op.batch_alter_table('dispute', schema=None) as batch_op:
+        batch_op.drop_index('ix_dispute_status_created')
+        batch_op.drop_index(batch_op.f('ix_dispute_claimed_by'))
+        batch_op.drop_constraint('fk_dispute_claimed_by_user', type_='foreignkey')
+        batch_op.drop_column('claimed_at')
+        batch_op.drop_column('claimed_by')
@@ -0,0 +1,36 @@
+"""indexes on review and message foreign keys used by the admin filters
+
+Revision ID: c2e8a4b61f90
+Revises: a9d3f07e2c18
+Create Date: 2026-10-19 13:02:55.118630
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2e8a4b61f90'
+down_revision = 'a9d3f07e2c18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('review', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_review_publisher_id'), ['publisher_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_review_task_id'), ['task_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_review_worker_id'), ['worker_id'], unique=False)
+
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_message_sender_id'), ['sender_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_message_sender_id'))
+
+    with op.batch_alter_table('review', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_review_worker_id'))
+        batch_op.drop_index(batch_op.f('ix_review_task_id'))
+        batch_op.drop_index(batch_op.f('ix_review_publisher_id'))
@@ -0,0 +1,37 @@
+"""user.username_lower for case-insensitive lookups
+
+Revision ID: e5b7c3d82a16
+Revises: c2e8a4b61f90
+Create Date: 2026-10-19 13:47:12.904371
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from api import online_schema
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b7c3d82a16'
+down_revision = 'c2e8a4b61f90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # nullable column + unique index: new and updated users get username_lower
+    # from the User validator, existing rows from the backfill below (or from
+    # "flask backfill username-lower" on a big table). NOT NULL: 8e3a5c1d9f60.
+    # Usernames that only differ in case must be fixed by hand before this runs.
+    online_schema.add_column('user', sa.Column('username_lower', sa.String(length=80), nullable=True))
+    online_schema.backfill_in_migration('username-lower')
+    online_schema.create_index_concurrently('uq_user_username_lower', 'user', ['username_lower'], unique=True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # databases migrated before the index replaced the unique constraint
+        op.execute('ALTER TABLE "user" DROP CONSTRAINT IF EXISTS uq_user_username_lower')
+    online_schema.drop_index_concurrently('uq_user_username_lower', 'user')
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('username_lower')
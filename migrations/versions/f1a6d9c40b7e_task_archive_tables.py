@@ -0,0 +1,99 @@
+"""archive tables for old completed tasks
+
+Revision ID: f1a6d9c40b7e
+Revises: e5b7c3d82a16
+Create Date: 2026-10-19 14:38:50.412377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from api import online_schema
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a6d9c40b7e'
+down_revision = 'e5b7c3d82a16'
+branch_labels = None
+depends_on = None
+
+# the init migration created these foreign keys unnamed
+NAMING = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+
+def _fk_name(table, column, referred):
+    if op.get_bind().dialect.name == 'postgresql':
+        return f'{table}_{column}_fkey'
+    return f'fk_{table}_{column}_{referred}'
+
+
+def upgrade():
+    op.create_table('task_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('title', sa.String(length=120), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('location', sa.String(length=120), nullable=True),
+    sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('due_at', sa.DateTime(), nullable=True),
+    sa.Column('posted_at', sa.Date(), nullable=False),
+    sa.Column('assigned_at', sa.Date(), nullable=True),
+    sa.Column('completed_at', sa.Date(), nullable=True),
+    sa.Column('status', sa.String(length=30), nullable=False),
+    sa.Column('publisher_id', sa.Integer(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('task_archive', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_task_archive_publisher_id'), ['publisher_id'], unique=False)
+
+    op.create_table('tasks_offered_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('status', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('created_at', sa.Date(), nullable=False),
+    sa.Column('updated_at', sa.Date(), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('tasker_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('tasks_offered_archive', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_tasks_offered_archive_task_id'), ['task_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_tasks_offered_archive_tasker_id'), ['tasker_id'], unique=False)
+
+    op.create_table('task_categories_archive',
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('task_id', 'category_id')
+    )
+
+    online_schema.create_index_concurrently('ix_task_completed_at', 'task', ['completed_at'])
+
+    # deals and reviews keep pointing at archived tasks/offers by id
+    with op.batch_alter_table('task_dealed', schema=None, naming_convention=NAMING) as batch_op:
+        batch_op.drop_constraint(_fk_name('task_dealed', 'task_id', 'task'), type_='foreignkey')
+        batch_op.drop_constraint(_fk_name('task_dealed', 'offer_id', 'tasks_offered'), type_='foreignkey')
+
+    with op.batch_alter_table('review', schema=None, naming_convention=NAMING) as batch_op:
+        batch_op.drop_constraint(_fk_name('review', 'task_id', 'task'), type_='foreignkey')
+
+
+def downgrade():
+    # archived tasks must be moved back to task first, or these will fail
+    with op.batch_alter_table('review', schema=None, naming_convention=NAMING) as batch_op:
+        batch_op.create_foreign_key(_fk_name('review', 'task_id', 'task'), 'task', ['task_id'], ['id'])
+
+    with op.batch_alter_table('task_dealed', schema=None, naming_convention=NAMING) as batch_op:
+        batch_op.create_foreign_key(_fk_name('task_dealed', 'offer_id', 'tasks_offered'), 'tasks_offered', ['offer_id'], ['id'])
+        batch_op.create_foreign_key(_fk_name('task_dealed', 'task_id', 'task'), 'task', ['task_id'], ['id'])
+
+    online_schema.drop_index_concurrently('ix_task_completed_at', 'task')
+
+    op.drop_table('task_categories_archive')
+    with op.batch_alter_table('tasks_offered_archive', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_tasks_offered_archive_tasker_id'))
+        batch_op.drop_index(batch_op.f('ix_tasks_offered_archive_task_id'))
+
+    op.drop_table('tasks_offered_archive')
+    with op.batch_alter_table('task_archive', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_task_archive_publisher_id'))
+
+    op.drop_table('task_archive')
@@ -7,4 +7,7 @@ npm run build
 
 pipenv install
 
+# .gz/.br de dist/ para que Flask no comprima en cada request (SERVE_FRONTEND=1)
+pipenv run flask compress-static
+
 pipenv run upgrade
@@ -1,17 +1,192 @@
-  
 import os
-from flask_admin import Admin
-from .models import db, User
+from flask import Flask, g, flash, request, Response
+from flask_admin import Admin, AdminIndexView
+from sqlalchemy import text, literal, or_
+from sqlalchemy.orm import load_only
+from . import deletion, disputes
+from .models import db, User, Task, TaskOffered, TaskDealed, Payment, Review, Dispute, Message
 from flask_admin.contrib.sqla import ModelView
 
+# above this many rows (planner estimate) the list view shows an approximate total
+APPROX_COUNT_THRESHOLD = 100_000
+
+
+class AdminAuthMixin:
+    """ Only users with the admin role, via HTTP Basic (email or username + password). """
+
+    def is_accessible(self):
+        if "admin_id" not in g:
+            g.admin_id = disputes.authenticate_admin(request.authorization)
+        return g.admin_id is not None
+
+    def inaccessible_callback(self, name, **kwargs):
+        return Response("Se requiere un admin", 401, {"WWW-Authenticate": 'Basic realm="Tasky admin"'})
+
+
+class SecureIndexView(AdminAuthMixin, AdminIndexView):
+    pass
+
+
+class FastModelView(AdminAuthMixin, ModelView):
+    """
+    ModelView for big tables:
+    - the list only loads the columns in column_list (plus the primary key),
+    - relationships shown in the list are joined (column_select_related_list),
+    - without search/filters the total comes from Postgres statistics
+      instead of a COUNT(*) over the whole table,
+    - search/filters should only use indexed columns. Flask-Admin searches
+      with ILIKE, which no btree index can serve (not even for "^term"), so
+      views set column_index_search: every term is compared with "=" against
+      those columns, an index lookup.
+    """
+    page_size = 50
+    can_set_page_size = True
+    column_default_sort = ("id", True)
+    column_display_pk = True
+    # ((column, normalize), ...): term matches when column == normalize(term)
+    column_index_search = ()
+
+    def search_placeholder(self):
+        return "valor exacto"
+
+    def _apply_search(self, query, count_query, joins, count_joins, search):
+        if not self.column_index_search:
+            return super()._apply_search(query, count_query, joins, count_joins, search)
+        for term in search.split():
+            term = term.lstrip("=")  # "=term" was the old syntax for exact
+            if not term:
+                continue
+            clause = or_(*[column == normalize(term) for column, normalize in self.column_index_search])
+            query = query.filter(clause)
+            if count_query is not None:
+                count_query = count_query.filter(clause)
+        return query, count_query, joins, count_joins
+
+    def get_query(self):
+        columns = [getattr(self.model, name) for name in (self.column_list or ())
+                   if name in self.model.__table__.columns]
+        query = super().get_query()
+        if columns:
+            query = query.options(load_only(*columns))
+        return query
+
+    def get_list(self, page, sort_column, sort_desc, search, filters, execute=True, page_size=None):
+        # get_count_query() needs to know if the count will be filtered
+        g.admin_unfiltered_count = not search and not filters
+        try:
+            return super().get_list(page, sort_column, sort_desc, search, filters,
+                                    execute=execute, page_size=page_size)
+        finally:
+            g.admin_unfiltered_count = False
+
+    def get_count_query(self):
+        if g.get("admin_unfiltered_count"):
+            estimate = _estimated_rows(self.model.__table__.name)
+            if estimate is not None and estimate >= APPROX_COUNT_THRESHOLD:
+                return self.session.query(literal(estimate))
+        return super().get_count_query()
+
+
+def _estimated_rows(table_name):
+    """ Planner row estimate (Postgres only). None when not available. """
+    if db.session.get_bind().dialect.name != "postgresql":
+        return None
+    estimate = db.session.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:t)"),
+        {"t": f'"{table_name}"'},
+    ).scalar()
+    # -1 / 0 means the table was never analyzed
+    return estimate if estimate and estimate > 0 else None
+
+
+def _delete_with(delete_fn, session, obj_id):
+    # set-based cascade instead of session.delete() (see api/deletion.py)
+    try:
+        delete_fn(session, obj_id)
+        session.commit()
+    except Exception as ex:
+        session.rollback()
+        flash(f"No se pudo eliminar: {ex}", "error")
+        return False
+    return True
+
+
+class UserView(FastModelView):
+    column_list = ("id", "email", "username", "created_at")
+    column_exclude_list = ("password",)
+    form_excluded_columns = ("password", "username_lower", "messages", "tasks")
+    column_searchable_list = ("email", "username")
+    # ix on email, uq_user_username_lower: case-insensitive username
+    column_index_search = ((User.email, str), (User.username_lower, str.lower))
+
+    def search_placeholder(self):
+        return "email o username exacto"
+
+    def delete_model(self, model):
+        return _delete_with(deletion.delete_user, self.session, model.id)
+
+
+class TaskView(FastModelView):
+    column_list = ("id", "title", "status", "price", "posted_at", "due_at", "publisher_id", "publisher")
+    column_select_related_list = (Task.publisher,)
+    column_filters = ("publisher_id", "status", "posted_at")
+    column_formatters = {"publisher": lambda v, c, m, p: m.publisher.username if m.publisher else None}
+
+    def delete_model(self, model):
+        return _delete_with(deletion.delete_task, self.session, model.id)
+
+
+class TaskOfferedView(FastModelView):
+    column_list = ("id", "task_id", "tasker_id", "status", "created_at")
+    column_filters = ("task_id", "tasker_id")
+
+
+class TaskDealedView(FastModelView):
+    column_list = ("id", "task_id", "offer_id", "client_id", "tasker_id", "status", "fixed_price", "accepted_at")
+    column_filters = ("task_id", "client_id", "tasker_id")
+
+
+class PaymentView(FastModelView):
+    column_list = ("id", "dealed_id", "amount", "status", "created_at", "updated_at")
+    column_filters = ("status", "dealed_id")
+
+
+class ReviewView(FastModelView):
+    column_list = ("id", "task_id", "task_dealed_id", "publisher_id", "worker_id", "rate", "created_at")
+    column_filters = ("task_id", "publisher_id", "worker_id")
+
+
+class DisputeView(FastModelView):
+    column_list = ("id", "dealed_id", "reason", "status", "raised_by", "claimed_by", "created_at")
+    column_filters = ("status", "created_at", "claimed_by")
+
+
+class MessageView(FastModelView):
+    column_list = ("id", "dealer_id", "sender_id", "created_at", "user")
+    column_select_related_list = (Message.user,)
+    column_filters = ("dealer_id", "sender_id")
+    column_formatters = {"user": lambda v, c, m, p: m.user.username if m.user else None}
+
+
 def setup_admin(app):
     app.secret_key = os.environ.get('FLASK_APP_KEY', 'sample key')
     app.config['FLASK_ADMIN_SWATCH'] = 'cerulean'
-    admin = Admin(app, name='4Geeks Admin', template_mode='bootstrap3')
+    admin = Admin(app, name='4Geeks Admin', template_mode='bootstrap3', index_view=SecureIndexView())
+
+    admin.add_view(UserView(User, db.session))
+    admin.add_view(TaskView(Task, db.session))
+    admin.add_view(TaskOfferedView(TaskOffered, db.session))
+    admin.add_view(TaskDealedView(TaskDealed, db.session))
+    admin.add_view(PaymentView(Payment, db.session))
+    admin.add_view(ReviewView(Review, db.session))
+    admin.add_view(DisputeView(Dispute, db.session))
+    admin.add_view(MessageView(Message, db.session))
 
-    
-    # Add your models here, for example this is how we add a the User model to the admin
-    admin.add_view(ModelView(User, db.session))
 
-    # You can duplicate that line to add mew models
-    # admin.add_view(ModelView(YourModelName, db.session))
\ No newline at end of file
+def create_admin_app(config):
+    """ App separada sólo para /admin; la monta LazyAdmin (app.py) en la primera visita. """
+    app = Flask(__name__)
+    app.config.from_mapping(config)
+    db.init_app(app)
+    setup_admin(app)
+    return app
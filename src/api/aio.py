@@ -0,0 +1,231 @@
+import asyncio
+import gzip
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from tempfile import SpooledTemporaryFile
+from urllib.parse import parse_qs
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+
+from api.db_routing import REPLICA_BIND, STICKY_COOKIE
+from api.models import Task
+
+"""
+ASGI serving mode (src/asgi.py).
+A few hot read routes are answered natively async with an async SQLAlchemy
+engine (asyncpg / aiosqlite), so a request waiting on the database does not
+hold a thread. Every other request goes to the Flask app (WsgiInThreads), so
+the API behaves the same as under gunicorn: each Flask request runs on a
+thread of a pool of ASGI_FLASK_THREADS, so slow uploads or writes do not
+queue behind each other. (asgiref's WsgiToAsgi runs them all on ONE shared
+thread, and under uvicorn keep-alive it leaks that thread's executor into the
+next request of the connection.)
+The async routes keep the Flask behaviour that matters to clients: same JSON,
+CORS headers, gzip above COMPRESS_MIN_BYTES and reads from the replica except
+for clients pinned to the primary after a write. They do not go through the
+in-process coalescing cache of api/coalesce.py.
+"""
+
+ASYNC_DRIVERS = {
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_url(url):
+    """ postgres://... -> postgresql+asyncpg://..., sqlite:///... -> sqlite+aiosqlite:///... """
+    scheme, rest = url.split("://", 1)
+    driver = ASYNC_DRIVERS.get(scheme.split("+")[0])
+    if driver is None:
+        raise ValueError(f"No async driver for {scheme}")
+    return f"{driver}://{rest}"
+
+
+class AsyncApi:
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        config = flask_app.config
+        self.wsgi = WsgiInThreads(flask_app, config.get("ASGI_FLASK_THREADS", 40))
+        self.engine = create_async_engine(async_url(config["SQLALCHEMY_DATABASE_URI"]))
+        replica_uri = (config.get("SQLALCHEMY_BINDS") or {}).get(REPLICA_BIND)
+        self.replica = create_async_engine(async_url(replica_uri)) if replica_uri else None
+        self.routes = {
+            ("GET", "/api/health"): self.health,
+            ("GET", "/api/tasks"): self.list_tasks,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] == "http":
+            handler = self.routes.get((scope["method"], scope["path"]))
+            if handler is not None:
+                response = await handler(scope)
+                if response is not None:
+                    return await self._send(scope, send, *response)
+        # everything else (and what the async routes do not cover): Flask
+        await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.engine.dispose()
+                if self.replica is not None:
+                    await self.replica.dispose()
+                self.wsgi.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # ---- helpers ------------------------------------------------------------
+
+    def _read_engine(self, scope):
+        if self.replica is None:
+            return self.engine
+        cookies = SimpleCookie(_header(scope, b"cookie") or "")
+        try:
+            last_write = float(cookies[STICKY_COOKIE].value) if STICKY_COOKIE in cookies else 0
+        except ValueError:
+            last_write = 0
+        sticky = self.flask_app.config.get("REPLICA_STICKY_SECONDS", 5)
+        return self.engine if time.time() - last_write <= sticky else self.replica
+
+    async def _send(self, scope, send, status, payload):
+        # compact, like jsonify() outside debug mode
+        body = self.flask_app.json.dumps(payload, separators=(",", ":")).encode() + b"\n"
+        headers = [(b"content-type", b"application/json")]
+
+        min_bytes = self.flask_app.config.get("COMPRESS_MIN_BYTES", 0)
+        if min_bytes and len(body) >= min_bytes and "gzip" in (_header(scope, b"accept-encoding") or ""):
+            body = await asyncio.to_thread(gzip.compress, body, 6)
+            headers += [(b"content-encoding", b"gzip"), (b"vary", b"Accept-Encoding")]
+
+        # same headers as flask-cors (app.py + supports_credentials in routes.py)
+        origin = _header(scope, b"origin")
+        if origin:
+            headers += [(b"access-control-allow-origin", origin.encode()),
+                        (b"access-control-allow-credentials", b"true"),
+                        (b"vary", b"Origin")]
+        else:
+            headers.append((b"access-control-allow-origin", b"*"))
+
+        headers.append((b"content-length", str(len(body)).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    # ---- routes (same answers as routes.py) --------------------------------
+
+    async def health(self, scope):
+        return 200, {"msg": "Hello from Tasky API"}
+
+    async def list_tasks(self, scope):
+        args = parse_qs(scope["query_string"].decode())
+        if "ids" in args:
+            return None  # multi-get stays in Flask
+        q = select(Task)
+        if args.get("status", [""])[0]:
+            q = q.where(Task.status == args["status"][0])
+        async with AsyncSession(self._read_engine(scope)) as session:
+            tasks = (await session.execute(q)).scalars().all()
+            return 200, [t.serialize() for t in tasks]
+
+
+class WsgiInThreads:
+    """
+    ASGI -> WSGI for the Flask app: one request per thread of the pool. The
+    request body is spooled (to disk above 64 KB) before the app runs and the
+    response is sent once the app returns; API answers are small and avatars
+    are capped by AVATAR_MAX_BYTES.
+    """
+
+    def __init__(self, wsgi_app, max_threads):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="flask")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        with SpooledTemporaryFile(max_size=65536) as body:
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                body.write(message.get("body", b""))
+                if not message.get("more_body"):
+                    break
+            body.seek(0)
+            loop = asyncio.get_running_loop()
+            status, headers, content = await loop.run_in_executor(
+                self.executor, self._run, _environ(scope, body))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": content})
+
+    def _run(self, environ):
+        started = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = [(name.lower().encode("latin-1"), value.encode("latin-1"))
+                                  for name, value in response_headers]
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            content = b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return started["status"], started["headers"], content
+
+
+def _environ(scope, body):
+    """ WSGI environ of an ASGI http scope (same rules as asgiref's WsgiToAsgi). """
+    script_name = scope.get("root_path", "").encode("utf8").decode("latin1")
+    path_info = scope["path"].encode("utf8").decode("latin1")
+    if path_info.startswith(script_name):
+        path_info = path_info[len(script_name):]
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": script_name,
+        "PATH_INFO": path_info,
+        "QUERY_STRING": scope["query_string"].decode("ascii"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": "HTTP/%s" % scope["http_version"],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        # the whole body is spooled: readable to EOF even without Content-Length (chunked)
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin1")
+        if name == "content-length":
+            key = "CONTENT_LENGTH"
+        elif name == "content-type":
+            key = "CONTENT_TYPE"
+        else:
+            key = "HTTP_" + name.upper().replace("-", "_")
+        value = value.decode("latin1")
+        environ[key] = environ[key] + "," + value if key in environ else value
+    return environ
+
+
+def _header(scope, name):
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
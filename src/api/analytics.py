@@ -0,0 +1,278 @@
+import gzip
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import select, func
+
+from api.models import (ChangeEvent, Category, Task, TaskArchive, TaskOffered, TaskOfferedArchive,
+                        TaskDealed, Payment, task_categories, task_categories_archive)
+
+"""
+Columnar snapshots of the reporting tables, so KPIs (api/kpis.py) are computed
+from files instead of heavy joins on the production database.
+Layout of the snapshot folder:
+    manifest.json               change_events offset + parts of every table
+    task/part-000001.parquet    one file per chunk, one column per field
+    ...
+Parts are Parquet when pyarrow is installed, otherwise gzipped JSON with the
+same column layout ({"columns": {"id": [...], ...}}).
+The first run (or --full) streams every table in keyset chunks. Later runs
+read change_events (api/changes.py) after the saved offset and write parts
+with the current version of the changed rows; a row with _deleted = true is
+a tombstone. Readers apply parts in order, the last version of an id wins.
+Tasks and offers are read from the hot table and from its archive (api/archive.py):
+archiving is recorded in change_events as a delete, so an incremental run
+re-reads the ids in both places and only writes a tombstone when the row is
+in neither.
+Category links are not in change_events: they are refreshed when the task
+changes or on the next --full export.
+Reads go to the replica when one is configured.
+"""
+
+MANIFEST = "manifest.json"
+DELETED = "_deleted"
+
+# snapshot table -> model and exported columns ("category_ids" comes from task_categories)
+TABLES = {
+    "task": (Task, ["id", "publisher_id", "status", "price", "posted_at",
+                    "assigned_at", "completed_at"]),
+    "tasks_offered": (TaskOffered, ["id", "task_id", "tasker_id", "created_at"]),
+    "task_dealed": (TaskDealed, ["id", "task_id", "offer_id", "status", "fixed_price",
+                                 "accepted_at", "delivered_at", "cancelled_at"]),
+    "payments": (Payment, ["id", "dealed_id", "amount", "status", "created_at"]),
+}
+# archive table of a hot table (same columns) -> its category links
+ARCHIVES = {
+    "task": TaskArchive,
+    "tasks_offered": TaskOfferedArchive,
+}
+CATEGORY_LINKS = {Task: task_categories, TaskArchive: task_categories_archive}
+
+
+def _sources(name):
+    """ Tables a snapshot table is read from: the hot one and its archive, if any. """
+    model = TABLES[name][0]
+    return (model, ARCHIVES[name]) if name in ARCHIVES else (model,)
+
+
+def _value(v):
+    if isinstance(v, Decimal):
+        return float(v)
+    if isinstance(v, (date, datetime)):
+        return v.isoformat()
+    return v
+
+
+# ---- part files -------------------------------------------------------------
+
+def _write_part(path, columns):
+    """ Writes path.parquet (pyarrow) or path.json.gz. Returns the file name. """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        pyarrow = None
+
+    if pyarrow:
+        pyarrow.parquet.write_table(pyarrow.table(columns), path + ".parquet")
+        return os.path.basename(path) + ".parquet"
+    with gzip.open(path + ".json.gz", "wt", encoding="utf-8") as f:
+        json.dump({"columns": columns}, f)
+    return os.path.basename(path) + ".json.gz"
+
+
+def read_part(path):
+    """ Returns the columns of a part file as {name: list}. """
+    if path.endswith(".parquet"):
+        import pyarrow.parquet
+        return pyarrow.parquet.read_table(path).to_pydict()
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)["columns"]
+
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _save_manifest(out_dir, manifest):
+    manifest["updated_at"] = datetime.utcnow().isoformat()
+    tmp = os.path.join(out_dir, MANIFEST + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    # the manifest only points to finished parts: a crash leaves the old one
+    os.replace(tmp, os.path.join(out_dir, MANIFEST))
+
+
+def read_table(out_dir, name, manifest=None):
+    """ Current rows of a snapshot table, as columns {name: list}, tombstones applied ({} if empty). """
+    manifest = manifest or load_manifest(out_dir)
+    rows = {}
+    columns = None
+    for part in manifest["tables"].get(name, []):
+        data = read_part(os.path.join(out_dir, name, part))
+        columns = columns or [c for c in data if c != DELETED]
+        deleted = data.get(DELETED) or [False] * len(data["id"])
+        for i, row_id in enumerate(data["id"]):
+            if deleted[i]:
+                rows.pop(row_id, None)
+            else:
+                rows[row_id] = i, data
+    columns = columns or []
+    ordered = sorted(rows)
+    return {c: [rows[row_id][1][c][rows[row_id][0]] for row_id in ordered] for c in columns}
+
+
+# ---- export -----------------------------------------------------------------
+
+def _fetch(conn, name, model, where, limit=None):
+    """ Rows of one source table (hot or archive) of a snapshot table, as columns. """
+    names = TABLES[name][1]
+    rows = conn.execute(
+        select(*[getattr(model, c) for c in names]).where(where).order_by(model.id).limit(limit)
+    ).all()
+    columns = {c: [_value(r[i]) for r in rows] for i, c in enumerate(names)}
+    if name == "task":
+        links_table = CATEGORY_LINKS[model]
+        ids = columns["id"]
+        links = {}
+        if ids:
+            for task_id, category_id in conn.execute(
+                    select(links_table.c.task_id, links_table.c.category_id)
+                    .where(links_table.c.task_id.in_(ids))):
+                links.setdefault(task_id, []).append(category_id)
+        columns["category_ids"] = [sorted(links.get(i, [])) for i in ids]
+    columns[DELETED] = [False] * len(rows)
+    return columns
+
+
+def _fetch_ids(conn, name, ids):
+    """ Current version of ids, from the hot table or the archive; ids in neither -> tombstones. """
+    columns = None
+    for model in _sources(name):
+        found = _fetch(conn, name, model, model.id.in_(ids))
+        if columns is None:
+            columns = found
+        else:
+            for c in columns:
+                columns[c].extend(found[c])
+
+    for row_id in sorted(set(ids) - set(columns["id"])):
+        for c in columns:
+            columns[c].append(None)
+        columns["id"][-1] = row_id
+        columns[DELETED][-1] = True
+        if name == "task":
+            columns["category_ids"][-1] = []
+    return columns
+
+
+class _Writer:
+    def __init__(self, out_dir, manifest):
+        self.out_dir = out_dir
+        self.manifest = manifest
+
+    def write(self, name, columns):
+        if not columns["id"]:
+            return 0
+        folder = os.path.join(self.out_dir, name)
+        os.makedirs(folder, exist_ok=True)
+        self.manifest["next_part"] += 1
+        part = _write_part(os.path.join(folder, "part-%06d" % self.manifest["next_part"]), columns)
+        self.manifest["tables"].setdefault(name, []).append(part)
+        return len(columns["id"])
+
+
+def _export_categories(conn, writer):
+    # small table: always rewritten whole
+    rows = conn.execute(select(Category.id, Category.name).order_by(Category.id)).all()
+    writer.manifest["tables"]["category"] = []
+    writer.write("category", {"id": [r.id for r in rows], "name": [r.name for r in rows]})
+
+
+def _full_export(conn, writer, chunk_size, on_chunk):
+    for name in TABLES:
+        writer.manifest["tables"][name] = []
+        for model in _sources(name):
+            last_id = 0
+            while True:
+                columns = _fetch(conn, name, model, model.id > last_id, limit=chunk_size)
+                if not columns["id"]:
+                    break
+                n = writer.write(name, columns)
+                last_id = columns["id"][-1]
+                if on_chunk:
+                    on_chunk(name, n)
+
+
+def _incremental_export(conn, writer, offset, chunk_size, on_chunk):
+    """ Re-exports the rows touched by change_events after offset. Returns the new offset. """
+    while True:
+        events = conn.execute(
+            select(ChangeEvent.id, ChangeEvent.entity, ChangeEvent.entity_id)
+            .where(ChangeEvent.id > offset)
+            .order_by(ChangeEvent.id)
+            .limit(chunk_size)
+        ).all()
+        if not events:
+            return offset
+        changed = {}
+        for e in events:
+            if e.entity in TABLES:
+                changed.setdefault(e.entity, set()).add(e.entity_id)
+        for name, ids in changed.items():
+            # an archived row ("delete" with {"archived": true}) is found in the archive table
+            n = writer.write(name, _fetch_ids(conn, name, sorted(ids)))
+            if on_chunk:
+                on_chunk(name, n)
+        offset = events[-1].id
+        # one manifest per batch of events: an interrupted run resumes from here
+        writer.manifest["offset"] = offset
+        _save_manifest(writer.out_dir, writer.manifest)
+
+
+def export_analytics(engine, out_dir, full=False, chunk_size=10000, on_chunk=None):
+    """
+    Creates or updates the snapshot in out_dir. Returns the manifest.
+    engine: where to read from (the replica when there is one).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    previous = load_manifest(out_dir)
+    manifest = None if full else previous
+
+    with engine.connect() as conn:
+        if manifest is None:
+            # offset taken before reading: changes made during the export are
+            # picked up again by the next incremental run (last version wins)
+            offset = conn.execute(select(func.max(ChangeEvent.id))).scalar() or 0
+            # new part numbers, the parts of the previous manifest stay valid until it is replaced
+            manifest = {"offset": offset, "next_part": previous["next_part"] if previous else 0,
+                        "tables": {}}
+            writer = _Writer(out_dir, manifest)
+            _full_export(conn, writer, chunk_size, on_chunk)
+        else:
+            writer = _Writer(out_dir, manifest)
+            manifest["offset"] = _incremental_export(conn, writer, manifest["offset"],
+                                                     chunk_size, on_chunk)
+        _export_categories(conn, writer)
+
+    _save_manifest(out_dir, manifest)
+    _remove_unlisted_parts(out_dir, manifest)
+    return manifest
+
+
+def _remove_unlisted_parts(out_dir, manifest):
+    # parts from an older full export or from an interrupted run
+    for name in os.listdir(out_dir):
+        folder = os.path.join(out_dir, name)
+        if not os.path.isdir(folder):
+            continue
+        keep = set(manifest["tables"].get(name, []))
+        for part in os.listdir(folder):
+            if part not in keep:
+                os.remove(os.path.join(folder, part))
@@ -0,0 +1,66 @@
+from datetime import date, timedelta
+
+from sqlalchemy import select, insert, delete
+
+from api.models import (Task, TaskArchive, TaskOffered, TaskOfferedArchive,
+                        task_categories, task_categories_archive)
+from api.changes import execute_tracked, DELETE
+
+"""
+Hot/cold split of the task table.
+Tasks completed more than `older_than_days` ago are moved, with their offers
+and category links, to the *_archive tables in batches. Every batch is
+INSERT ... SELECT into the archive + DELETE from the hot tables, in one
+transaction, so a task is always in exactly one of the two places.
+get_task (routes.py) falls back to task_archive, so archived ids keep working.
+Used by the "flask archive-tasks" command.
+"""
+
+TASK_COLUMNS = [c.name for c in Task.__table__.columns]
+OFFER_COLUMNS = [c.name for c in TaskOffered.__table__.columns]
+
+
+def archive_completed_tasks(session, older_than_days=180, batch_size=1000,
+                            max_batches=None, on_batch=None):
+    """ Moves old completed tasks to the archive. Returns the number of tasks moved. """
+    cutoff = date.today() - timedelta(days=older_than_days)
+    moved = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        # SKIP LOCKED (Postgres): two runs at the same time take different tasks
+        ids = session.execute(
+            select(Task.id)
+            .where(Task.completed_at < cutoff)
+            .order_by(Task.completed_at, Task.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+        if not ids:
+            session.rollback()
+            break
+
+        session.execute(insert(TaskArchive).from_select(
+            TASK_COLUMNS,
+            select(*[Task.__table__.c[name] for name in TASK_COLUMNS]).where(Task.id.in_(ids))))
+        session.execute(insert(TaskOfferedArchive).from_select(
+            OFFER_COLUMNS,
+            select(*[TaskOffered.__table__.c[name] for name in OFFER_COLUMNS])
+            .where(TaskOffered.task_id.in_(ids))))
+        session.execute(insert(task_categories_archive).from_select(
+            ["task_id", "category_id"],
+            select(task_categories.c.task_id, task_categories.c.category_id)
+            .where(task_categories.c.task_id.in_(ids))))
+
+        # for change_events consumers the rows leave the hot tables
+        execute_tracked(session, TaskOffered, delete(TaskOffered).where(TaskOffered.task_id.in_(ids)),
+                        DELETE, {"archived": True})
+        session.execute(delete(task_categories).where(task_categories.c.task_id.in_(ids)))
+        execute_tracked(session, Task, delete(Task).where(Task.id.in_(ids)),
+                        DELETE, {"archived": True})
+        session.commit()
+
+        moved += len(ids)
+        batches += 1
+        if on_batch:
+            on_batch(moved)
+    return moved
@@ -0,0 +1,127 @@
+import hashlib
+import os
+import tempfile
+
+from api.storage import get_storage
+from api.utils import APIException
+
+"""
+Avatar upload pipeline:
+1. the request body is streamed in chunks to a temp file while it is hashed,
+2. the sha256 gives a content-addressed key, so duplicate uploads are free,
+3. thumbnails are resized in a process pool (Pillow is CPU bound),
+4. everything is handed to the storage backend (see api/storage.py).
+"""
+
+CHUNK_SIZE = 64 * 1024
+THUMBNAIL_SIZES = (64, 128, 256)
+
+# first bytes of the formats we accept -> extension
+_MAGIC = (
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+
+MIMETYPES = {"jpg": "image/jpeg", "png": "image/png",
+             "gif": "image/gif", "webp": "image/webp"}
+
+_pool = None
+
+
+def _sniff(head):
+    for magic, ext in _MAGIC:
+        if head.startswith(magic):
+            return ext
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def _get_pool(max_workers=None):
+    # created on first upload, so it is never forked from the gunicorn master
+    global _pool
+    if _pool is None:
+        from concurrent.futures import ProcessPoolExecutor  # pulls in multiprocessing
+        _pool = ProcessPoolExecutor(max_workers=max_workers)
+    return _pool
+
+
+def thumbnail_key(key, size):
+    return f"{os.path.splitext(key)[0]}_{size}.jpg"
+
+
+def _make_thumbnails(src_path, sizes, out_dir):
+    """ Runs in a worker process. Returns {size: path of the resized jpg}. """
+    from PIL import Image
+
+    out = {}
+    with Image.open(src_path) as img:
+        img.load()
+        img = img.convert("RGB")
+        for size in sizes:
+            thumb = img.copy()
+            thumb.thumbnail((size, size))
+            fd, path = tempfile.mkstemp(suffix=".jpg", dir=out_dir)
+            with os.fdopen(fd, "wb") as f:
+                thumb.save(f, "JPEG", quality=85, optimize=True)
+            out[size] = path
+    return out
+
+
+def stream_to_tempfile(stream, max_bytes, tmp_dir=None):
+    """ Copies the stream to a temp file chunk by chunk. Returns (path, sha256, ext). """
+    digest = hashlib.sha256()
+    total = 0
+    ext = None
+    fd, path = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if ext is None:
+                    ext = _sniff(chunk)
+                    if ext is None:
+                        raise APIException("Formato de imagen no soportado", 415)
+                total += len(chunk)
+                if total > max_bytes:
+                    raise APIException("La imagen es demasiado grande", 413)
+                digest.update(chunk)
+                f.write(chunk)
+        if total == 0:
+            raise APIException("El cuerpo de la petición está vacío")
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, digest.hexdigest(), ext
+
+
+def save_avatar(stream, app):
+    """ Stores an uploaded avatar and its thumbnails. Returns the content key. """
+    storage = get_storage(app)
+    tmp_dir = app.config.get("AVATAR_TMP_DIR")
+    path, sha, ext = stream_to_tempfile(
+        stream, app.config.get("AVATAR_MAX_BYTES", 5 * 1024 * 1024), tmp_dir)
+    key = f"{sha}.{ext}"
+
+    if storage.exists(key):
+        # same content uploaded before: nothing to resize or store
+        os.remove(path)
+        return key
+
+    try:
+        future = _get_pool(app.config.get("AVATAR_WORKERS")).submit(
+            _make_thumbnails, path, THUMBNAIL_SIZES, tmp_dir or os.path.dirname(path))
+        thumbs = future.result(timeout=30)
+    except Exception:
+        os.remove(path)
+        raise APIException("No se pudo procesar la imagen")
+
+    # thumbnails first: the original is the marker checked by exists()
+    for size, thumb_path in thumbs.items():
+        storage.put(thumbnail_key(key, size), thumb_path)
+    storage.put(key, path)
+    return key
@@ -0,0 +1,98 @@
+import json
+
+from sqlalchemy import event, insert, inspect, text
+
+from api.db_routing import RoutingSession
+from api.models import ChangeEvent, Task, TaskOffered, TaskDealed, Payment
+
+"""
+Change-data-capture log (table change_events), read with GET /api/events.
+Every insert/update/delete of a tracked model adds one event in the same
+transaction as the change:
+- ORM changes (session.add, attribute changes, session.delete) are picked up
+  by the after_flush event of db.session;
+- bulk UPDATE/DELETE statements skip the flush, so the services run them with
+  execute_tracked(), which uses RETURNING id to know the rows they touched.
+Events are buffered per session and inserted right before COMMIT. On Postgres
+that insert holds a transaction-level advisory lock until the commit, so
+offsets (change_events.id) are handed out in commit order and a consumer that
+asks for "after=N" never skips an event that committed late.
+"""
+
+TRACKED = (Task, TaskOffered, TaskDealed, Payment)
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+
+# any constant works, it only has to be the same for every writer
+LOCK_KEY = 0x7A5C0001
+_BUFFER = "change_events"
+
+
+def _dumps(data):
+    return json.dumps(data, default=str) if data is not None else None
+
+
+def _event(obj_or_model, entity_id, op, data):
+    return {"entity": obj_or_model.__tablename__, "entity_id": entity_id,
+            "op": op, "data": _dumps(data)}
+
+
+def record(session, model, op, ids, data=None):
+    """ Adds one event per id to the session buffer (written on commit). """
+    session.info.setdefault(_BUFFER, []).extend(_event(model, i, op, data) for i in ids)
+
+
+def execute_tracked(session, model, stmt, op, data=None):
+    """ Runs a bulk UPDATE/DELETE of a tracked model and records its rows. Returns the ids. """
+    ids = session.execute(
+        stmt.returning(model.id).execution_options(synchronize_session=False)
+    ).scalars().all()
+    record(session, model, op, ids, data)
+    return ids
+
+
+def _columns(state, only_changed=False):
+    # only what is already loaded: no lazy loads in the middle of a flush
+    data = {}
+    for attr in state.mapper.column_attrs:
+        if attr.key not in state.dict:
+            continue
+        if only_changed and not state.attrs[attr.key].history.has_changes():
+            continue
+        data[attr.key] = state.dict[attr.key]
+    return data
+
+
+def _after_flush(session, flush_context):
+    buffer = session.info.setdefault(_BUFFER, [])
+    for obj in session.new:
+        if isinstance(obj, TRACKED):
+            state = inspect(obj)
+            buffer.append(_event(obj, state.dict["id"], INSERT, _columns(state)))
+    for obj in session.dirty:
+        if isinstance(obj, TRACKED) and session.is_modified(obj, include_collections=False):
+            state = inspect(obj)
+            buffer.append(_event(obj, state.identity[0], UPDATE, _columns(state, only_changed=True)))
+    for obj in session.deleted:
+        if isinstance(obj, TRACKED):
+            buffer.append(_event(obj, inspect(obj).identity[0], DELETE, None))
+
+
+def _before_commit(session):
+    session.flush()
+    rows = session.info.pop(_BUFFER, None)
+    if not rows:
+        return
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": LOCK_KEY})
+    session.execute(insert(ChangeEvent), rows)
+
+
+def _after_rollback(session):
+    session.info.pop(_BUFFER, None)
+
+
+event.listen(RoutingSession, "after_flush", _after_flush)
+event.listen(RoutingSession, "before_commit", _before_commit)
+event.listen(RoutingSession, "after_rollback", _after_rollback)
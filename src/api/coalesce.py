@@ -0,0 +1,111 @@
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, request
+
+from api.utils import TTLCache
+
+"""
+Request coalescing (single flight) for hot GET endpoints.
+When a cached answer is missing, concurrent identical requests (same path and
+query string) in a worker wait for one computation instead of all hitting the
+database. Answers are fresh for `fresh` seconds; for `stale` more seconds they
+are still served while a single request recomputes them (stale-while-revalidate).
+Clients pinned to the primary after a write (db_routing) skip the cache, so
+they still read their own changes. Turn it off with READ_COALESCING=0.
+The cache lives in the worker process: with N gunicorn workers a cold key is
+computed at most N times, not once per request.
+"""
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _Entry:
+    def __init__(self, body, status, headers, fresh_until):
+        self.body = body
+        self.status = status
+        self.headers = headers
+        self.fresh_until = fresh_until
+
+    def response(self):
+        # a new Response every time: after_request hooks modify it
+        return current_app.response_class(self.body, self.status, self.headers)
+
+
+class Coalescer:
+
+    def __init__(self, fresh=2, stale=30, maxsize=512):
+        self.fresh = fresh
+        self._cache = TTLCache(maxsize=maxsize, ttl=fresh + stale)
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        """ Call after writes that change the cached answers. """
+        self._cache.clear()
+
+    def _single_flight(self, key, compute):
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = compute()
+        except Exception as ex:
+            flight.error = ex
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+        return flight.result
+
+    def _compute(self, key, view, args, kwargs):
+        response = current_app.make_response(view(*args, **kwargs))
+        entry = _Entry(response.get_data(), response.status_code,
+                       list(response.headers.items()), time.monotonic() + self.fresh)
+        # 5xx are not remembered, the next request tries again
+        if response.status_code < 500:
+            self._cache.set(key, entry)
+        return entry
+
+    def cached(self, view):
+        """ Decorator for GET views of the api Blueprint. """
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if (request.method != "GET" or not g.get("db_use_replica", True)
+                    or not current_app.config.get("READ_COALESCING", True)):
+                return view(*args, **kwargs)
+
+            key = request.full_path
+            entry = self._cache.get(key, None)
+            if entry is not None:
+                if entry.fresh_until > time.monotonic():
+                    return entry.response()
+                # stale: one request recomputes, the others get the old answer now
+                with self._lock:
+                    refreshing = key in self._inflight
+                if refreshing:
+                    return entry.response()
+
+            return self._single_flight(
+                key, lambda: self._compute(key, view, args, kwargs)).response()
+        return wrapper
+
+
+# GET /tasks and GET /tasks/<id>; create/delete of tasks clear it
+task_reads = Coalescer(fresh=2, stale=30)
@@ -1,6 +1,18 @@
 
+import os
+import json
+import time
 import click
+from datetime import timedelta
 from api.models import db, User
+from api.payments import settle_pending_payments
+from api.idempotency import purge_expired_keys
+from api.archive import archive_completed_tasks
+from api.expiry import expire_overdue_tasks
+from api.frontend import precompress
+from api.analytics import export_analytics
+from api.kpis import report
+from api.online_schema import BACKFILLS, run_backfill
 
 """
 In this file, you can add as many commands as you want using the @app.cli.command decorator
@@ -31,4 +43,125 @@ def setup_commands(app):
 
     @app.cli.command("insert-test-data")
     def insert_test_data():
-        pass
\ No newline at end of file
+        pass
+
+    @app.cli.command("settle-payments")
+    @click.option("--batch-size", default=5000, show_default=True, help="Pagos por UPDATE")
+    @click.option("--limit", default=None, type=int, help="Máximo de pagos a liquidar")
+    def settle_payments(batch_size, limit):
+        """ Pasa los pagos pending a settled en lotes: $ flask settle-payments """
+        start = time.perf_counter()
+        total = settle_pending_payments(
+            db.session, batch_size=batch_size, limit=limit,
+            on_batch=lambda n: print("Settled", n, "payments"))
+        elapsed = time.perf_counter() - start
+        print(f"Done: {total} payments settled in {elapsed:.2f}s")
+
+    @app.cli.command("purge-idempotency-keys")
+    @click.option("--older-than-hours", default=24, show_default=True,
+                  help="Antigüedad mínima de las Idempotency-Key a borrar")
+    @click.option("--batch-size", default=1000, show_default=True)
+    def purge_idempotency_keys(older_than_hours, batch_size):
+        """ Borra las Idempotency-Key viejas (cron diario): $ flask purge-idempotency-keys """
+        total = purge_expired_keys(db.session, older_than=timedelta(hours=older_than_hours),
+                                   batch_size=batch_size)
+        print(f"Done: {total} idempotency keys deleted")
+
+    @app.cli.command("archive-tasks")
+    @click.option("--older-than-days", default=None, type=int,
+                  help="Edad mínima desde completed_at (default: TASK_ARCHIVE_AFTER_DAYS o 180)")
+    @click.option("--batch-size", default=1000, show_default=True)
+    @click.option("--max-batches", default=None, type=int, help="Cortar tras N lotes")
+    @click.option("--pause", default=0.0, show_default=True, help="Segundos de espera entre lotes")
+    def archive_tasks(older_than_days, batch_size, max_batches, pause):
+        """ Mueve tareas completadas antiguas a task_archive: $ flask archive-tasks """
+        if older_than_days is None:
+            older_than_days = app.config["TASK_ARCHIVE_AFTER_DAYS"]
+
+        def progress(n):
+            print("Archived", n, "tasks")
+            if pause:
+                time.sleep(pause)
+
+        total = archive_completed_tasks(
+            db.session, older_than_days=older_than_days, batch_size=batch_size,
+            max_batches=max_batches, on_batch=progress)
+        print(f"Done: {total} tasks archived")
+
+    @app.cli.command("expire-tasks")
+    @click.option("--batch-size", default=500, show_default=True)
+    @click.option("--max-batches", default=None, type=int, help="Cortar tras N lotes (sigue en la próxima corrida)")
+    @click.option("--loop", is_flag=True, help="Modo worker: repetir cada --interval segundos")
+    @click.option("--interval", default=60, show_default=True, help="Segundos entre barridos con --loop")
+    def expire_tasks(batch_size, max_batches, loop, interval):
+        """ Pasa a expired las tareas pending con due_at vencido: $ flask expire-tasks """
+        while True:
+            total = expire_overdue_tasks(
+                db.session, batch_size=batch_size, max_batches=max_batches,
+                on_batch=lambda n: print("Expired", n, "tasks"))
+            print(f"Done: {total} tasks expired")
+            if not loop:
+                break
+            db.session.remove()
+            time.sleep(interval)
+
+    @app.cli.command("compress-static")
+    @click.option("--dir", "root", default=None, help="Carpeta del build (default: FRONTEND_DIR o dist/)")
+    @click.option("--min-bytes", default=1024, show_default=True, help="No comprimir archivos más chicos")
+    def compress_static(root, min_bytes):
+        """ Genera .gz/.br de los assets del frontend (en el deploy): $ flask compress-static """
+        root = root or app.config.get("FRONTEND_DIR") or os.path.join(app.root_path, "..", "dist")
+        total = precompress(
+            root, min_bytes=min_bytes,
+            on_file=lambda path, size, out: print(f"{path}: {size} -> {out} bytes"))
+        print(f"Done: {total} compressed files written in {root}")
+
+    def analytics_dir():
+        return app.config.get("ANALYTICS_DIR") or os.path.join(app.instance_path, "analytics")
+
+    @app.cli.command("export-analytics")
+    @click.option("--dir", "out_dir", default=None, help="Carpeta del snapshot (default: ANALYTICS_DIR o instance/analytics)")
+    @click.option("--full", is_flag=True, help="Rehacer el snapshot completo en vez de aplicar los cambios")
+    @click.option("--chunk-size", default=10000, show_default=True, help="Filas (o eventos) por archivo")
+    def export_analytics_command(out_dir, full, chunk_size):
+        """ Actualiza los snapshots columnares para reportes: $ flask export-analytics """
+        out_dir = out_dir or analytics_dir()
+        # lee de la réplica si hay, no de la primaria
+        engine = db.engines.get("replica") or db.engine
+        start = time.perf_counter()
+        manifest = export_analytics(
+            engine, out_dir, full=full, chunk_size=chunk_size,
+            on_chunk=lambda name, n: print("Exported", n, "rows of", name))
+        elapsed = time.perf_counter() - start
+        print(f"Done: snapshot at offset {manifest['offset']} in {out_dir} ({elapsed:.2f}s)")
+
+    @app.cli.command("analytics-report")
+    @click.option("--dir", "snapshot_dir", default=None, help="Carpeta del snapshot (default: ANALYTICS_DIR o instance/analytics)")
+    def analytics_report(snapshot_dir):
+        """ KPIs (GMV por categoría, conversión, tiempo de asignación) desde el snapshot: $ flask analytics-report """
+        print(json.dumps(report(snapshot_dir or analytics_dir()), indent=2, default=str))
+
+    @app.cli.command("backfill")
+    @click.argument("name", required=False)
+    @click.option("--batch-size", default=1000, show_default=True, help="Filas por UPDATE")
+    @click.option("--pause", default=0.1, show_default=True, help="Segundos de espera entre lotes")
+    @click.option("--max-batches", default=None, type=int, help="Cortar tras N lotes (sigue en la próxima corrida)")
+    @click.option("--restart", is_flag=True, help="Ignorar el checkpoint y empezar desde el id 0")
+    def backfill(name, batch_size, pause, max_batches, restart):
+        """ Rellena una columna nueva en lotes reanudables: $ flask backfill username-lower """
+        if name not in BACKFILLS:
+            print("Backfills:")
+            for b in BACKFILLS.values():
+                print(f"  {b.name:20s} {b.description}")
+            return
+
+        def progress(updated, last_id, max_id, rate):
+            pct = 100.0 * last_id / max_id if max_id else 100.0
+            eta = (max_id - last_id) / rate if rate and max_id > last_id else 0
+            print(f"Updated {updated} rows, id {last_id}/{max_id} ({pct:.1f}%), "
+                  f"{rate:,.0f} rows/s, ~{eta:.0f}s left")
+
+        start = time.perf_counter()
+        total = run_backfill(db.session, BACKFILLS[name], batch_size=batch_size, pause=pause,
+                             max_batches=max_batches, restart=restart, on_batch=progress)
+        print(f"Done: {total} rows updated in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,58 @@
+import time
+
+from flask import g, has_request_context, current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+"""
+Read-replica routing for db.session.
+When REPLICA_DATABASE_URL is set (bind "replica"), GET requests of the api
+Blueprint read from the replica. Writes always go to the primary, and so does
+everything after the first write of a request. After a request that wrote,
+the client gets a short-lived cookie and its next requests read from the
+primary too, so users see their own changes despite replication lag.
+"""
+
+REPLICA_BIND = "replica"
+STICKY_COOKIE = "tasky_last_write"
+
+
+class RoutingSession(Session):
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or not has_request_context():
+            return engine
+
+        if self._flushing or isinstance(clause, UpdateBase) \
+                or getattr(clause, "_for_update_arg", None) is not None:
+            g.db_wrote = True
+            return engine
+
+        replica = self._db.engines.get(REPLICA_BIND)
+        if (replica is not None and engine is self._db.engines.get(None)
+                and g.get("db_use_replica") and not g.get("db_wrote")):
+            return replica
+        return engine
+
+
+def _sticky_seconds():
+    return current_app.config.get("REPLICA_STICKY_SECONDS", 5)
+
+
+def use_replica_for(request):
+    """ before_request: decide if this request may read from the replica. """
+    try:
+        last_write = float(request.cookies.get(STICKY_COOKIE, 0))
+    except ValueError:
+        last_write = 0
+    g.db_use_replica = (request.method in ("GET", "HEAD")
+                        and time.time() - last_write > _sticky_seconds())
+
+
+def mark_write(response):
+    """ after_request: pin the client to the primary for a while after a write. """
+    if g.get("db_wrote"):
+        response.set_cookie(STICKY_COOKIE, str(time.time()), max_age=_sticky_seconds(),
+                            httponly=True, samesite="Lax")
+    return response
@@ -0,0 +1,107 @@
+from sqlalchemy import select, delete, update, or_
+
+from api.models import (User, Profile, AccountSettings, UserRole, Task, TaskArchive,
+                        TaskOffered, TaskOfferedArchive, TaskDealed, Payment, Review,
+                        Message, Dispute, Admin_action, task_categories,
+                        task_categories_archive)
+from api.changes import execute_tracked, record, DELETE
+
+"""
+Set-based cascading deletes.
+Instead of session.delete(obj) (which loads every relationship and deletes
+row by row), each dependent table gets one DELETE ... WHERE x IN (subquery),
+children first. Deleting a user with thousands of tasks is the same ~25
+statements as deleting one with none, and nothing is loaded into the session.
+The caller commits (or rolls back) the transaction.
+"""
+
+
+def _run(session, stmt):
+    return session.execute(stmt.execution_options(synchronize_session=False))
+
+
+def _run_tracked(session, model, stmt):
+    # tasks, offers, deals and payments also go to change_events (api/changes.py)
+    return len(execute_tracked(session, model, stmt, DELETE))
+
+
+def _run_archived(session, model, archive_model, stmt):
+    # consumers know the rows by the hot table name (archive.py records the move as a delete)
+    ids = session.execute(
+        stmt.returning(archive_model.id).execution_options(synchronize_session=False)
+    ).scalars().all()
+    record(session, model, DELETE, ids)
+    return len(ids)
+
+
+def _delete_deals(session, deal_ids):
+    """ deal_ids: SELECT of task_dealed ids. Deletes the deals and what hangs from them. """
+    dispute_ids = select(Dispute.id).where(Dispute.dealed_id.in_(deal_ids))
+    _run(session, delete(Admin_action).where(Admin_action.dispute_id.in_(dispute_ids)))
+    _run(session, delete(Dispute).where(Dispute.dealed_id.in_(deal_ids)))
+    _run(session, delete(Message).where(Message.dealer_id.in_(deal_ids)))
+    _run(session, delete(Review).where(Review.task_dealed_id.in_(deal_ids)))
+    _run_tracked(session, Payment, delete(Payment).where(Payment.dealed_id.in_(deal_ids)))
+    _run_tracked(session, TaskDealed, delete(TaskDealed).where(TaskDealed.id.in_(deal_ids)))
+
+
+def _delete_tasks(session, task_ids):
+    """ task_ids: SELECT of task ids. Returns the number of tasks deleted. """
+    _delete_deals(session, select(TaskDealed.id).where(TaskDealed.task_id.in_(task_ids)))
+    _run(session, delete(Review).where(Review.task_id.in_(task_ids)))
+    _run(session, delete(task_categories).where(task_categories.c.task_id.in_(task_ids)))
+    _run_tracked(session, TaskOffered, delete(TaskOffered).where(TaskOffered.task_id.in_(task_ids)))
+    return _run_tracked(session, Task, delete(Task).where(Task.id.in_(task_ids)))
+
+
+def _delete_archived_tasks(session, task_ids):
+    """ task_ids: SELECT of task_archive ids (api/archive.py). Returns the number of tasks deleted. """
+    # deals and reviews are not archived: they still point to the task id
+    _delete_deals(session, select(TaskDealed.id).where(TaskDealed.task_id.in_(task_ids)))
+    _run(session, delete(Review).where(Review.task_id.in_(task_ids)))
+    _run(session, delete(task_categories_archive).where(task_categories_archive.c.task_id.in_(task_ids)))
+    _run_archived(session, TaskOffered, TaskOfferedArchive,
+                  delete(TaskOfferedArchive).where(TaskOfferedArchive.task_id.in_(task_ids)))
+    return _run_archived(session, Task, TaskArchive, delete(TaskArchive).where(TaskArchive.id.in_(task_ids)))
+
+
+def delete_task(session, task_id):
+    """
+    Deletes a task and its offers, deals, payments, reviews... falling back to
+    the archive tables for archived tasks. Returns False if it did not exist.
+    """
+    if _delete_tasks(session, select(Task.id).where(Task.id == task_id)) == 1:
+        return True
+    return _delete_archived_tasks(session, select(TaskArchive.id).where(TaskArchive.id == task_id)) == 1
+
+
+def delete_user(session, user_id):
+    """ Deletes a user and everything that references it. Returns False if it did not exist. """
+    _delete_tasks(session, select(Task.id).where(Task.publisher_id == user_id))
+
+    # deals on other users' tasks where the user is client or tasker
+    _delete_deals(session, select(TaskDealed.id).where(
+        or_(TaskDealed.client_id == user_id, TaskDealed.tasker_id == user_id)))
+    _run_tracked(session, TaskOffered, delete(TaskOffered).where(TaskOffered.tasker_id == user_id))
+    _run(session, delete(Review).where(
+        or_(Review.publisher_id == user_id, Review.worker_id == user_id)))
+    _run(session, delete(Message).where(Message.sender_id == user_id))
+
+    raised = select(Dispute.id).where(Dispute.raised_by == user_id)
+    _run(session, delete(Admin_action).where(
+        or_(Admin_action.dispute_id.in_(raised), Admin_action.admin_user == user_id)))
+    _run(session, delete(Dispute).where(Dispute.raised_by == user_id))
+    _run(session, update(Dispute).where(Dispute.resolved_by_admin_user == user_id)
+         .values(resolved_by_admin_user=None))
+    _run(session, update(Dispute).where(Dispute.claimed_by == user_id)
+         .values(claimed_by=None, claimed_at=None))
+
+    # archived tasks (api/archive.py) and the user's archived offers
+    _delete_archived_tasks(session, select(TaskArchive.id).where(TaskArchive.publisher_id == user_id))
+    _run_archived(session, TaskOffered, TaskOfferedArchive,
+                  delete(TaskOfferedArchive).where(TaskOfferedArchive.tasker_id == user_id))
+
+    _run(session, delete(Profile).where(Profile.user_id == user_id))
+    _run(session, delete(AccountSettings).where(AccountSettings.user_id == user_id))
+    _run(session, delete(UserRole).where(UserRole.c.user_id == user_id))
+    return _run(session, delete(User).where(User.id == user_id)).rowcount == 1
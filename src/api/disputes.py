@@ -0,0 +1,114 @@
+import hmac
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update, or_, exists
+
+from api.models import db, Dispute, Admin_action, Rol, UserRole, User
+
+"""
+Admin work queue for disputes.
+Open disputes are claimed by an admin for CLAIM_LEASE; an expired claim goes
+back to the queue. On Postgres the candidates are read with
+FOR UPDATE SKIP LOCKED, so concurrent admins never wait on (or get) the same rows;
+the conditional UPDATE keeps the claim safe on SQLite, which has no row locks.
+"""
+
+OPEN = "open"
+RESOLVED = "resolved"
+REJECTED = "rejected"
+CLOSED_STATUSES = (RESOLVED, REJECTED)
+
+CLAIM_LEASE = timedelta(minutes=30)
+
+
+def is_admin(user_id):
+    return db.session.execute(
+        select(exists().where(
+            UserRole.c.user_id == user_id,
+            UserRole.c.role_id == Rol.id,
+            Rol.type == "admin",
+        ))
+    ).scalar()
+
+
+def authenticate_admin(auth):
+    """
+    HTTP Basic credentials (request.authorization) -> id of the admin, or None.
+    Username is the email or username of a user with the admin role.
+    """
+    if not auth or auth.type != "basic" or not auth.username or auth.password is None:
+        return None
+    user = db.session.execute(
+        select(User).where(or_(User.email == auth.username, User.username == auth.username))
+    ).scalars().first()
+    # passwords are stored as sent (see create_user): constant-time compare
+    if not user or not hmac.compare_digest(user.password.encode(), auth.password.encode()):
+        return None
+    return user.id if is_admin(user.id) else None
+
+
+def _claimable(now):
+    return (
+        Dispute.status == OPEN,
+        or_(Dispute.claimed_by.is_(None), Dispute.claimed_at < now - CLAIM_LEASE),
+    )
+
+
+def claim_disputes(admin_id, limit=1):
+    """ Claims up to `limit` of the oldest claimable disputes. Returns them. """
+    now = datetime.utcnow()
+    ids = db.session.execute(
+        select(Dispute.id)
+        .where(*_claimable(now))
+        .order_by(Dispute.created_at, Dispute.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not ids:
+        db.session.rollback()
+        return []
+
+    db.session.execute(
+        update(Dispute)
+        .where(Dispute.id.in_(ids), *_claimable(now))
+        .values(claimed_by=admin_id, claimed_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    # rows another admin took between the SELECT and the UPDATE are not ours
+    return db.session.execute(
+        select(Dispute)
+        .where(Dispute.id.in_(ids), Dispute.claimed_by == admin_id, Dispute.claimed_at == now)
+        .order_by(Dispute.created_at, Dispute.id)
+    ).scalars().all()
+
+
+def release_dispute(dispute, admin_id):
+    result = db.session.execute(
+        update(Dispute)
+        .where(Dispute.id == dispute.id, Dispute.claimed_by == admin_id, Dispute.status == OPEN)
+        .values(claimed_by=None, claimed_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def close_dispute(dispute, admin_id, status, resolution, action):
+    """ Closes a dispute claimed by admin_id and records the Admin_action. """
+    now = datetime.utcnow()
+    result = db.session.execute(
+        update(Dispute)
+        .where(Dispute.id == dispute.id, Dispute.claimed_by == admin_id, Dispute.status == OPEN)
+        .values(status=status, resolution=resolution,
+                resolved_by_admin_user=admin_id, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        db.session.rollback()
+        return False
+    db.session.add(Admin_action(action=action, created_at=now,
+                                dispute_id=dispute.id, admin_user=admin_id))
+    db.session.commit()
+    db.session.refresh(dispute)
+    return True
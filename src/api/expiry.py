@@ -0,0 +1,68 @@
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from api.models import Task, JobCheckpoint
+from api.changes import execute_tracked, UPDATE
+
+"""
+Expiry of overdue tasks: pending tasks whose due_at has passed become "expired",
+so the feed only has to ask for status = 'pending'.
+The sweep walks ix_task_pending_due_at (partial index on pending tasks) in
+(due_at, id) order. It keeps no cursor: an expired task leaves the partial
+index, so every batch (and a run cut short by --max-batches, a crash or a
+deploy) simply starts again from the oldest overdue task still pending.
+Safe on several nodes at once: rows are picked with SKIP LOCKED (Postgres)
+and only expired if they are still pending. job_checkpoint only records when
+the job last made progress.
+Used by the "flask expire-tasks" command.
+"""
+
+PENDING = "pending"
+EXPIRED = "expired"
+JOB_NAME = "expire-tasks"
+
+
+def _touch_checkpoint(session):
+    # upsert: two nodes starting at once must not both INSERT the row
+    if session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    now = datetime.utcnow()
+    stmt = insert(JobCheckpoint).values(name=JOB_NAME, cursor=None, updated_at=now)
+    session.execute(stmt.on_conflict_do_update(index_elements=[JobCheckpoint.name],
+                                               set_={"updated_at": now}))
+
+
+def expire_overdue_tasks(session, batch_size=500, max_batches=None, now=None, on_batch=None):
+    """ Marks overdue pending tasks as expired. Returns how many were expired. """
+    now = now or datetime.utcnow()
+    expired = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = session.execute(
+            select(Task.id)
+            .where(Task.status == PENDING, Task.due_at.isnot(None), Task.due_at <= now)
+            .order_by(Task.due_at, Task.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+        if not ids:
+            session.commit()
+            break
+
+        changed = execute_tracked(
+            session, Task,
+            update(Task)
+            .where(Task.id.in_(ids), Task.status == PENDING)
+            .values(status=EXPIRED),
+            UPDATE, {"status": EXPIRED})
+        _touch_checkpoint(session)
+        session.commit()
+
+        expired += len(changed)
+        batches += 1
+        if on_batch:
+            on_batch(expired)
+    return expired
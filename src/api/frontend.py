@@ -0,0 +1,130 @@
+import gzip
+import mimetypes
+import os
+
+from flask import abort, current_app, request, send_file
+from werkzeug.security import safe_join
+
+"""
+Serving of the built frontend (vite build -> dist/) and response compression,
+so one Render service can answer both the SPA and the API.
+- "flask compress-static" (render_build.sh) writes file.gz / file.br next to
+  every text asset at deploy time; requests get the smallest variant their
+  Accept-Encoding allows, without compressing anything per request.
+- Vite only content-hashes what it writes to dist/assets/ (index-3f2a9c1b.js):
+  those never change, so they are cached for a year with "immutable". Files
+  copied from public/ keep their name and get a short max-age; index.html is
+  always revalidated.
+- JSON responses of the API bigger than COMPRESS_MIN_BYTES are gzipped on the fly.
+Enabled with SERVE_FRONTEND=1 (FRONTEND_DIR defaults to <repo>/dist).
+"""
+
+COMPRESSIBLE = {".js", ".mjs", ".css", ".html", ".svg", ".json", ".map", ".txt", ".xml", ".ico"}
+# preferred first
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+ASSETS_PREFIX = "assets/"
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+SHORT = "public, max-age=3600"
+
+
+def _frontend_dir(app):
+    return app.config.get("FRONTEND_DIR") or os.path.join(app.root_path, "..", "dist")
+
+
+def _cache_control(filename):
+    if filename.endswith(".html"):
+        return REVALIDATE
+    if filename.startswith(ASSETS_PREFIX):
+        return IMMUTABLE
+    return SHORT
+
+
+def _send(root, filename):
+    path = safe_join(root, filename)
+    if path is None or not os.path.isfile(path):
+        return None
+
+    encoding = None
+    for name, suffix in PRECOMPRESSED:
+        if request.accept_encodings[name] and os.path.isfile(path + suffix):
+            encoding, path = name, path + suffix
+            break
+
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    response = send_file(path, mimetype=mimetype, conditional=True, max_age=0)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    if os.path.splitext(filename)[1] in COMPRESSIBLE:
+        response.vary.add("Accept-Encoding")
+    response.headers["Cache-Control"] = _cache_control(filename)
+    return response
+
+
+def serve_frontend(filename="index.html"):
+    if filename.startswith(("api/", "admin/")):
+        abort(404)
+    root = _frontend_dir(current_app)
+    response = _send(root, filename)
+    if response is None:
+        # missing asset -> 404; any other path is a client-side route of the SPA
+        if os.path.splitext(filename)[1]:
+            abort(404)
+        response = _send(root, "index.html") or abort(404)
+    return response
+
+
+def compress_json(response):
+    """ after_request: gzip big JSON answers for clients that accept it. """
+    min_bytes = current_app.config.get("COMPRESS_MIN_BYTES", 0)
+    if (not min_bytes or response.mimetype != "application/json"
+            or response.direct_passthrough or response.status_code < 200
+            or "Content-Encoding" in response.headers
+            or not request.accept_encodings["gzip"]):
+        return response
+    data = response.get_data()
+    if len(data) < min_bytes:
+        return response
+    response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers["Content-Encoding"] = "gzip"
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def setup_frontend(app):
+    app.add_url_rule("/", "frontend_index", serve_frontend)
+    app.add_url_rule("/<path:filename>", "frontend", serve_frontend)
+
+
+def precompress(root, min_bytes=1024, on_file=None):
+    """ Writes .gz (and .br if Brotli is installed) next to the text assets. Returns files written. """
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    written = 0
+    for folder, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(folder, name)
+            if os.path.splitext(name)[1] not in COMPRESSIBLE or os.path.getsize(path) < min_bytes:
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            variants = [(".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+            if brotli:
+                variants.append((".br", lambda d: brotli.compress(d, quality=11)))
+            for suffix, compress in variants:
+                out = compress(data)
+                # not worth it (already compressed, tiny gains); drop a variant left by an older build
+                if len(out) >= len(data) * 0.95:
+                    if os.path.exists(path + suffix):
+                        os.remove(path + suffix)
+                    continue
+                with open(path + suffix, "wb") as f:
+                    f.write(out)
+                written += 1
+                if on_file:
+                    on_file(path + suffix, len(data), len(out))
+    return written
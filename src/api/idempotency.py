@@ -0,0 +1,99 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import request, jsonify
+from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+
+from api.models import db, IdempotencyKey
+
+"""
+Idempotent POST endpoints.
+The client sends an "Idempotency-Key" header; the response is stored in the
+idempotency_keys table in the same transaction as the changes of the request,
+so a retry gets the stored response back and nothing runs twice.
+Views decorated with @idempotent must NOT commit: the decorator does it.
+Keys are kept for RETENTION; "flask purge-idempotency-keys" deletes older ones.
+"""
+
+HEADER = "Idempotency-Key"
+RETENTION = timedelta(hours=24)
+
+
+def _request_hash():
+    # the path too: the same key on /payments/1/settle and /payments/2/settle
+    # is a different request, not a retry
+    digest = hashlib.sha256(request.path.encode())
+    digest.update(b"\n")
+    digest.update(request.get_data() or b"")
+    return digest.hexdigest()
+
+
+def _replay(row):
+    if row.endpoint != request.endpoint or row.request_hash != _request_hash():
+        return jsonify({"error": "Idempotency-Key ya usada con otra petición"}), 422
+    resp = jsonify(json.loads(row.response_body))
+    resp.status_code = row.response_status
+    resp.headers["Idempotent-Replayed"] = "true"
+    return resp
+
+
+def idempotent(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is not None and len(key) > 255:
+            return jsonify({"error": f"{HEADER} demasiado larga"}), 400
+
+        if key:
+            row = db.session.get(IdempotencyKey, key)
+            if row:
+                return _replay(row)
+
+        try:
+            body, status = view(*args, **kwargs)
+            if status >= 400:
+                db.session.rollback()
+                return body, status
+
+            if key:
+                db.session.add(IdempotencyKey(
+                    key=key,
+                    endpoint=request.endpoint,
+                    request_hash=_request_hash(),
+                    response_status=status,
+                    response_body=json.dumps(body.get_json()),
+                ))
+            db.session.commit()
+        except IntegrityError:
+            # a concurrent request with the same key won the race, either on
+            # our own rows (flush inside the view) or on the key (commit):
+            # drop our work and answer with the stored response
+            db.session.rollback()
+            row = db.session.get(IdempotencyKey, key) if key else None
+            if row:
+                return _replay(row)
+            return jsonify({"error": "Conflicto con otra petición concurrente"}), 409
+        return body, status
+
+    return wrapper
+
+
+def purge_expired_keys(session, older_than=RETENTION, batch_size=1000, now=None):
+    """ Deletes keys created more than older_than ago, in batches (ix created_at). Returns how many. """
+    cutoff = (now or datetime.utcnow()) - older_than
+    deleted = 0
+    while True:
+        keys = session.execute(
+            select(IdempotencyKey.key)
+            .where(IdempotencyKey.created_at < cutoff)
+            .order_by(IdempotencyKey.created_at)
+            .limit(batch_size)
+        ).scalars().all()
+        if not keys:
+            return deleted
+        session.execute(delete(IdempotencyKey).where(IdempotencyKey.key.in_(keys)))
+        session.commit()
+        deleted += len(keys)
@@ -0,0 +1,86 @@
+from datetime import date
+from statistics import mean, median
+
+from api.analytics import load_manifest, read_table
+
+"""
+Business KPIs computed over the columnar snapshots of api/analytics.py, never
+over the production database. Everything works column by column on plain
+lists (one pass per column, dict lookups instead of joins), so no NumPy or
+pandas is needed. Used by the "flask analytics-report" command.
+"""
+
+SETTLED = "settled"
+
+
+def _days_between(start, end):
+    return (date.fromisoformat(end[:10]) - date.fromisoformat(start[:10])).days
+
+
+def gmv_by_category(task, deals, payments, categories):
+    """
+    Settled payment amount per category name. A task in several categories
+    counts in each of them; tasks without category go to None.
+    """
+    deal_task = dict(zip(deals.get("id", []), deals.get("task_id", [])))
+    task_categories = dict(zip(task.get("id", []), task.get("category_ids", [])))
+    names = dict(zip(categories.get("id", []), categories.get("name", [])))
+
+    gmv = {}
+    for dealed_id, amount, status in zip(payments.get("dealed_id", []),
+                                         payments.get("amount", []),
+                                         payments.get("status", [])):
+        if status != SETTLED or amount is None:
+            continue
+        category_ids = task_categories.get(deal_task.get(dealed_id)) or [None]
+        for category_id in category_ids:
+            name = names.get(category_id)
+            gmv[name] = gmv.get(name, 0) + amount
+    return {name: round(total, 2) for name, total in gmv.items()}
+
+
+def offer_conversion(offers, deals):
+    """ Share of tasks with at least one offer that ended in a deal, and deals per offer. """
+    offered_tasks = set(offers.get("task_id", []))
+    dealt_tasks = set(deals.get("task_id", [])) & offered_tasks
+    n_offers = len(offers.get("id", []))
+    return {
+        "tasks_with_offers": len(offered_tasks),
+        "tasks_with_deal": len(dealt_tasks),
+        "task_conversion": round(len(dealt_tasks) / len(offered_tasks), 4) if offered_tasks else None,
+        "deals_per_offer": round(len(deals.get("id", [])) / n_offers, 4) if n_offers else None,
+    }
+
+
+def time_to_assignment(task):
+    """ Days from posted_at to assigned_at of the assigned tasks (mean, median, p90). """
+    days = sorted(_days_between(posted, assigned)
+                  for posted, assigned in zip(task.get("posted_at", []), task.get("assigned_at", []))
+                  if posted and assigned)
+    if not days:
+        return {"assigned_tasks": 0, "mean_days": None, "median_days": None, "p90_days": None}
+    return {
+        "assigned_tasks": len(days),
+        "mean_days": round(mean(days), 2),
+        "median_days": median(days),
+        "p90_days": days[min(len(days) - 1, int(len(days) * 0.9))],
+    }
+
+
+def report(snapshot_dir):
+    """ All the KPIs of the snapshot in snapshot_dir. """
+    manifest = load_manifest(snapshot_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No snapshot in {snapshot_dir} (run flask export-analytics)")
+    task = read_table(snapshot_dir, "task", manifest)
+    offers = read_table(snapshot_dir, "tasks_offered", manifest)
+    deals = read_table(snapshot_dir, "task_dealed", manifest)
+    payments = read_table(snapshot_dir, "payments", manifest)
+    categories = read_table(snapshot_dir, "category", manifest)
+    return {
+        "snapshot_offset": manifest["offset"],
+        "snapshot_updated_at": manifest.get("updated_at"),
+        "gmv_by_category": gmv_by_category(task, deals, payments, categories),
+        "offer_conversion": offer_conversion(offers, deals),
+        "time_to_assignment": time_to_assignment(task),
+    }
@@ -1,10 +1,15 @@
+import json
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import String, Boolean, Integer, ForeignKey, Date, Text, Numeric, DateTime, func, UniqueConstraint, Float
-from sqlalchemy.orm import relationship, Mapped, mapped_column
+from sqlalchemy import String, Boolean, Integer, BigInteger, ForeignKey, Date, Text, Numeric, DateTime, func, UniqueConstraint, Float, Index
+from sqlalchemy import event, exists, inspect, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import relationship, Mapped, mapped_column, validates
 from datetime import date, datetime
 from decimal import Decimal
 
-db = SQLAlchemy()
+from api.db_routing import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 # Tabla que relaciona user con rol
 UserRole = db.Table(
@@ -21,6 +26,10 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
     username = db.Column(db.String(80), unique=True, nullable=False)
+    # lower(username), kept in sync by the validator below:
+    # case-insensitive lookups are an index point lookup on this column
+    # (unique index, built CONCURRENTLY by its migration)
+    username_lower = db.Column(db.String(80), nullable=False)
     password = db.Column(db.String(200), nullable=False)
     created_at = db.Column(db.DateTime, nullable=False,
                            server_default=func.current_timestamp())
@@ -29,6 +38,15 @@ class User(db.Model):
     roles = db.relationship('Rol', secondary='user_rol',)
     messages = db.relationship('Message', back_populates='user')
 
+    __table_args__ = (
+        db.Index("uq_user_username_lower", "username_lower", unique=True),
+    )
+
+    @validates('username')
+    def _normalize_username(self, key, value):
+        self.username_lower = value.lower() if value is not None else None
+        return value
+
     def serialize(self):
         return {
             "id": self.id,
@@ -130,20 +148,33 @@ class Task(db.Model):
     posted_at = db.Column(db.Date, nullable=False,
                           server_default=func.current_date())
     assigned_at = db.Column(db.Date, nullable=True)
-    completed_at = db.Column(db.Date, nullable=True)
+    # indexed: the archiver (api/archive.py) picks tasks by completed_at
+    completed_at = db.Column(db.Date, nullable=True, index=True)
 
     # business-defined value (app.py)
     status = db.Column(db.String(30), nullable=False, server_default="pending")
 
     # FK + relationship (1 User -> many Tasks)
     publisher_id = db.Column(db.Integer, ForeignKey(
-        "user.id"), nullable=False, index=True)
+        "user.id"), nullable=False)
     publisher = db.relationship("User", backref="tasks")
 
     # relationship categories
     categories = db.relationship(
         "Category", secondary=task_categories, back_populates="tasks")
 
+    # composite index: covers lookups by publisher_id alone and the
+    # publisher dashboard filters (status + posted_at range)
+    __table_args__ = (
+        Index("ix_task_publisher_status_posted",
+              "publisher_id", "status", "posted_at"),
+        # partial index: only pending tasks with a due date, i.e. what
+        # "flask expire-tasks" has to look at (api/expiry.py)
+        Index("ix_task_pending_due_at", "due_at", "id",
+              postgresql_where=db.text("status = 'pending' AND due_at IS NOT NULL"),
+              sqlite_where=db.text("status = 'pending' AND due_at IS NOT NULL")),
+    )
+
     def serialize(self):
         return {
             "id": self.id,
@@ -167,6 +198,38 @@ class Task(db.Model):
         }
 
 
+class TaskArchive(db.Model):
+    """ Cold storage for old completed tasks. Same columns as Task. """
+    __tablename__ = "task_archive"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    title = db.Column(db.String(120), nullable=True)
+    description = db.Column(db.Text, nullable=True)
+    location = db.Column(db.String(120), nullable=True)
+    price = db.Column(db.Numeric(10, 2), nullable=True)
+    due_at = db.Column(db.DateTime, nullable=True)
+    posted_at = db.Column(db.Date, nullable=False)
+    assigned_at = db.Column(db.Date, nullable=True)
+    completed_at = db.Column(db.Date, nullable=True)
+    status = db.Column(db.String(30), nullable=False)
+    publisher_id = db.Column(db.Integer, nullable=False, index=True)
+    archived_at = db.Column(db.DateTime, nullable=False,
+                            server_default=func.current_timestamp())
+
+    def serialize(self):
+        return {
+            "id": self.id,
+            "title": self.title,
+        }
+
+
+task_categories_archive = db.Table(
+    "task_categories_archive",
+    db.Column("task_id", Integer, primary_key=True),
+    db.Column("category_id", Integer, primary_key=True),
+)
+
+
 class Category(db.Model):
     __tablename__ = "category"
 
@@ -224,6 +287,18 @@ class TaskOffered(db.Model):
         }
 
 
+class TaskOfferedArchive(db.Model):
+    """ Offers of the tasks in task_archive. Same columns as TaskOffered. """
+    __tablename__ = "tasks_offered_archive"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    status = db.Column(db.Numeric(10, 2), nullable=True)
+    created_at = db.Column(db.Date, nullable=False)
+    updated_at = db.Column(db.Date, nullable=False)
+    task_id = db.Column(db.Integer, nullable=False, index=True)
+    tasker_id = db.Column(db.Integer, nullable=False, index=True)
+
+
 class TaskDealed(db.Model):
     __tablename__ = "task_dealed"
 
@@ -237,11 +312,11 @@ class TaskDealed(db.Model):
     delivered_at = db.Column(db.Date, nullable=True)
     cancelled_at = db.Column(db.Date, nullable=True)
     # FK
-    task_id = db.Column(
-        db.Integer, ForeignKey("task.id"), nullable=False, index=True
-    )
-    offer_id = db.Column(db.Integer, ForeignKey(
-        "tasks_offered.id"), nullable=False, index=True)
+    # task_id / offer_id have no DB foreign key: old tasks and their offers
+    # are moved to task_archive / tasks_offered_archive (see api/archive.py).
+    # They are checked on write instead (_check_archivable_refs below)
+    task_id = db.Column(db.Integer, nullable=False, index=True)
+    offer_id = db.Column(db.Integer, nullable=False, index=True)
     client_id = db.Column(db.Integer, ForeignKey(
         "user.id"), nullable=False, index=True)
     tasker_id = db.Column(db.Integer, ForeignKey(
@@ -283,6 +358,11 @@ class Payment(db.Model):
     dealed_id = db.Column(db.Integer, ForeignKey(
         "task_dealed.id", ondelete="CASCADE"), unique=True, nullable=False, index=True)
 
+    # settlement walks pending payments by id (keyset pagination)
+    __table_args__ = (
+        Index("ix_payments_status_id", "status", "id"),
+    )
+
     def serialize(self):
         return {
             "id": self.id,
@@ -294,18 +374,69 @@ class Payment(db.Model):
         }
 
 
+class IdempotencyKey(db.Model):
+    """
+    Stored response of a request sent with an Idempotency-Key header.
+    A retried request with the same key gets this response back
+    instead of being executed again (see api/idempotency.py).
+    """
+    __tablename__ = "idempotency_keys"
+
+    key = db.Column(db.String(255), primary_key=True)
+    endpoint = db.Column(db.String(120), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    response_status = db.Column(db.Integer, nullable=False)
+    response_body = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False,
+                           server_default=func.current_timestamp(), index=True)
+
+
+class JobCheckpoint(db.Model):
+    """ Progress of a background job (JSON cursor), so the next run resumes from it. """
+    __tablename__ = "job_checkpoint"
+
+    name = db.Column(db.String(50), primary_key=True)
+    cursor = db.Column(db.Text, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=False,
+                           server_default=func.current_timestamp())
+
+
+class ChangeEvent(db.Model):
+    """ Append-only log of changes to tasks, offers, deals and payments (api/changes.py). id is the offset. """
+    __tablename__ = "change_events"
+
+    id = db.Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    entity = db.Column(db.String(30), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)
+    data = db.Column(db.Text, nullable=True)  # JSON: full row on insert, changed columns on update
+    created_at = db.Column(db.DateTime, nullable=False,
+                           server_default=func.current_timestamp())
+
+    def serialize(self):
+        return {
+            "offset": self.id,
+            "entity": self.entity,
+            "entity_id": self.entity_id,
+            "op": self.op,
+            "data": json.loads(self.data) if self.data else None,
+            "created_at": self.created_at,
+        }
+
+
 class Review(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     review = db.Column(db.String(10000), nullable=True)
     rate = db.Column(db.Numeric(3, 2), nullable=False)
     created_at = db.Column(db.DateTime(timezone=True))
     publisher_id = db.Column(
-        db.Integer, ForeignKey('user.id'), nullable=False)
+        db.Integer, ForeignKey('user.id'), nullable=False, index=True)
     worker_id = db.Column(
-        db.Integer, ForeignKey('user.id'), nullable=False)
+        db.Integer, ForeignKey('user.id'), nullable=False, index=True)
     task_dealed_id = db.Column(
         db.Integer, ForeignKey('task_dealed.id'), unique=True, nullable=False)
-    task_id = db.Column(db.Integer, ForeignKey('task.id'), nullable=False)
+    # no DB foreign key: the task may be in task_archive (checked on write)
+    task_id = db.Column(db.Integer, nullable=False, index=True)
 
     def serialize(self):
         return {
@@ -326,7 +457,7 @@ class Message(db.Model):
     dealer_id = db.Column(db.Integer, ForeignKey(
         'task_dealed.id'), unique=True, nullable=False)
     sender_id = db.Column(db.Integer, ForeignKey(
-        'user.id'), nullable=False)
+        'user.id'), nullable=False, index=True)
     user = db.relationship('User', back_populates='messages')
 
     def serialize(self):
@@ -352,6 +483,15 @@ class Dispute(db.Model):
     raised_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     resolved_by_admin_user = db.Column(
         db.Integer, db.ForeignKey('user.id'), nullable=True)
+    # admin work queue: who is working on it and since when (lease)
+    claimed_by = db.Column(
+        db.Integer, db.ForeignKey('user.id'), nullable=True, index=True)
+    claimed_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    # queue of open disputes ordered by age
+    __table_args__ = (
+        Index("ix_dispute_status_created", "status", "created_at", "id"),
+    )
 
     def serialize(self):
         return {
@@ -365,6 +505,8 @@ class Dispute(db.Model):
             "dealed_id": self.dealed_id,
             "raised_by": self.raised_by,
             "resolved_by_admin_user": self.resolved_by_admin_user,
+            "claimed_by": self.claimed_by,
+            "claimed_at": self.claimed_at,
         }
 
 
@@ -373,9 +515,9 @@ class Admin_action(db.Model):
     action = db.Column(db.String(60), nullable=False)
     created_at = db.Column(db.DateTime(timezone=True))
     dispute_id = db.Column(
-        db.Integer, ForeignKey('dispute.id'), nullable=False)
+        db.Integer, ForeignKey('dispute.id'), nullable=False, index=True)
     admin_user = db.Column(
-        db.Integer, ForeignKey('user.id'), unique=True, nullable=False)
+        db.Integer, ForeignKey('user.id'), nullable=False, index=True)
 
     def serialize(self):
         return {
@@ -385,3 +527,34 @@ class Admin_action(db.Model):
             "dispute_id": self.dispute_id,
             "admin_user": self.admin_user,
         }
+
+
+# ---- references to rows that may be archived -----------------------------------
+# column -> (hot table, archive table): the referenced row must be in one of them
+ARCHIVABLE_REFS = {
+    TaskDealed: {"task_id": (Task.__table__, TaskArchive.__table__),
+                 "offer_id": (TaskOffered.__table__, TaskOfferedArchive.__table__)},
+    Review: {"task_id": (Task.__table__, TaskArchive.__table__)},
+}
+
+
+def _check_archivable_refs(mapper, connection, target):
+    """ What the dropped foreign keys did: fail the flush on a dangling reference. """
+    state = inspect(target)
+    for column, (hot, archive) in ARCHIVABLE_REFS[type(target)].items():
+        if state.has_identity and not state.attrs[column].history.has_changes():
+            continue
+        value = getattr(target, column)
+        found = connection.execute(select(or_(
+            exists().where(hot.c.id == value),
+            exists().where(archive.c.id == value),
+        ))).scalar()
+        if not found:
+            raise IntegrityError(
+                f"{mapper.local_table.name}.{column} = {value} is not in {hot.name} nor {archive.name}",
+                {column: value}, None)
+
+
+for _model in ARCHIVABLE_REFS:
+    event.listen(_model, "before_insert", _check_archivable_refs)
+    event.listen(_model, "before_update", _check_archivable_refs)
@@ -0,0 +1,234 @@
+import json
+import time
+from datetime import datetime
+
+import sqlalchemy as sa
+from sqlalchemy import select, update, func
+
+from api.models import User, JobCheckpoint
+
+"""
+Schema changes that do not stall production traffic on big tables.
+Migration helpers (call them from migrations/versions/*.py instead of
+op.batch_alter_table, which rebuilds tables on SQLite and takes blocking
+locks on Postgres):
+- create_index_concurrently / drop_index_concurrently: CREATE/DROP INDEX
+  CONCURRENTLY on Postgres, outside the migration transaction;
+- add_column: only columns Postgres can add without rewriting the table
+  (nullable, or with a constant server_default);
+- set_not_null: CHECK ... NOT VALID + VALIDATE, so the table is scanned
+  without blocking writes before SET NOT NULL.
+A new column is filled with "flask backfill <name>" between two migrations:
+    1. migration: add_column(...) nullable (+ backfill_in_migration(<name>),
+       which fills small tables right away)
+    2. deploy code that writes the column, then: flask backfill <name>
+    3. migration, in a LATER release: set_not_null(...) / create_index_concurrently(...)
+Backfills update rows in keyset batches, sleep between batches and save the
+last id in job_checkpoint, so they can be stopped and resumed at any time.
+They are meant for derived columns and do not write change_events.
+"""
+
+# Postgres: fail fast instead of queueing behind a long transaction
+# (every query on the table would queue behind our ALTER)
+LOCK_TIMEOUT = "5s"
+# backfill_in_migration(): tables up to this many pending rows are filled by the migration itself
+INLINE_BACKFILL_MAX_ROWS = 100_000
+
+
+def _op():
+    from alembic import op
+    return op
+
+
+def _is_postgres(op):
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def _set_lock_timeout(op):
+    if _is_postgres(op):
+        op.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+
+
+# ---- migration helpers -------------------------------------------------------
+
+def create_index_concurrently(name, table, columns, unique=False, where=None):
+    """ op.create_index that does not block writes on Postgres. where: partial index condition (text). """
+    op = _op()
+    kwargs = {}
+    if where is not None:
+        kwargs = {"postgresql_where": sa.text(where), "sqlite_where": sa.text(where)}
+    if not _is_postgres(op):
+        op.create_index(name, table, columns, unique=unique, **kwargs)
+        return
+
+    with op.get_context().autocommit_block():
+        # a CONCURRENTLY build that failed leaves an INVALID index behind
+        invalid = op.get_bind().execute(sa.text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"), {"name": name}).scalar()
+        if invalid:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+        op.create_index(name, table, columns, unique=unique, if_not_exists=True,
+                        postgresql_concurrently=True, **kwargs)
+
+
+def drop_index_concurrently(name, table):
+    op = _op()
+    if not _is_postgres(op):
+        op.drop_index(name, table_name=table)
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+
+
+def add_column(table, column):
+    """ op.add_column, refusing columns that would rewrite the whole table. """
+    default = column.server_default
+    if not column.nullable and default is None:
+        raise ValueError(
+            f"{table}.{column.name}: add it nullable, run a backfill and then set_not_null()")
+    if default is not None:
+        arg = getattr(default, "arg", None)
+        constant = isinstance(arg, str) or (isinstance(arg, sa.TextClause) and "(" not in arg.text)
+        if not constant:
+            # now(), random()... are evaluated per row: Postgres rewrites the table
+            raise ValueError(f"{table}.{column.name}: server_default must be a constant")
+    op = _op()
+    _set_lock_timeout(op)
+    # plain ALTER TABLE ADD COLUMN: no batch mode, SQLite adds it in place too
+    op.add_column(table, column)
+
+
+def set_not_null(table, column, existing_type):
+    """ SET NOT NULL without a full-table scan under an exclusive lock (Postgres 12+). """
+    op = _op()
+    if not _is_postgres(op):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(column, existing_type=existing_type, nullable=False)
+        return
+
+    check = f"ck_{table}_{column}_not_null"
+    # one transaction per statement: the ACCESS EXCLUSIVE locks of ADD CONSTRAINT
+    # and SET NOT NULL are released right away instead of lasting until the
+    # end of the migration, across the VALIDATE scan
+    with op.get_context().autocommit_block():
+        op.execute(f"SET lock_timeout = '{LOCK_TIMEOUT}'")
+        # left behind by a run that failed half way
+        op.execute(f'ALTER TABLE "{table}" DROP CONSTRAINT IF EXISTS {check}')
+        op.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT {check} CHECK ("{column}" IS NOT NULL) NOT VALID')
+        # VALIDATE scans the table but only takes SHARE UPDATE EXCLUSIVE (writes go on)
+        op.execute(f'ALTER TABLE "{table}" VALIDATE CONSTRAINT {check}')
+        # with a valid CHECK in place Postgres skips the scan here
+        op.alter_column(table, column, existing_type=existing_type, nullable=False)
+        op.drop_constraint(check, table, type_="check")
+        op.execute("RESET lock_timeout")
+
+
+# ---- backfills ---------------------------------------------------------------
+
+class Backfill:
+    """ Sets `values` on the rows of `model` that match `pending`. """
+
+    def __init__(self, name, model, values, pending, description=""):
+        self.name = name
+        self.model = model
+        self.values = values
+        self.pending = pending
+        self.description = description
+
+    @property
+    def job_name(self):
+        return f"backfill:{self.name}"
+
+
+BACKFILLS = {b.name: b for b in [
+    Backfill("username-lower", User,
+             values={"username_lower": func.lower(User.username)},
+             pending=User.username_lower.is_(None),
+             description="user.username_lower = lower(username)"),
+]}
+
+
+def backfill_in_migration(name, max_rows=INLINE_BACKFILL_MAX_ROWS, batch_size=1000):
+    """
+    Runs a registered backfill inside the current migration when at most
+    max_rows are pending (small tables: deploys keep working without a manual
+    step). Bigger tables are left to "flask backfill <name>". Returns the
+    number of rows still pending.
+    """
+    backfill = BACKFILLS[name]
+    model = backfill.model
+    conn = _op().get_bind()
+    pending = conn.execute(select(func.count()).select_from(model).where(backfill.pending)).scalar()
+    if pending > max_rows:
+        return pending
+    last_id = 0
+    while True:
+        ids = conn.execute(
+            select(model.id).where(model.id > last_id, backfill.pending).order_by(model.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return 0
+        conn.execute(update(model).where(model.id.in_(ids), backfill.pending).values(backfill.values))
+        last_id = ids[-1]
+
+
+def _load_last_id(session, job_name):
+    row = session.get(JobCheckpoint, job_name)
+    if not row or not row.cursor:
+        return 0
+    return json.loads(row.cursor)["last_id"]
+
+
+def _save_last_id(session, job_name, last_id):
+    row = session.get(JobCheckpoint, job_name) or JobCheckpoint(name=job_name)
+    row.cursor = json.dumps({"last_id": last_id}) if last_id is not None else None
+    row.updated_at = datetime.utcnow()
+    session.add(row)
+
+
+def run_backfill(session, backfill, batch_size=1000, pause=0.0, max_batches=None,
+                 restart=False, on_batch=None):
+    """
+    Runs a backfill from its checkpoint. Every batch is one keyset SELECT of ids
+    and one UPDATE ... WHERE id IN (...) AND <pending>, committed on its own.
+    on_batch(updated, last_id, max_id, rows_per_second) reports progress.
+    Returns the number of rows updated in this run.
+    """
+    model = backfill.model
+    last_id = 0 if restart else _load_last_id(session, backfill.job_name)
+    # progress is measured on the id range: no COUNT(*) over a huge table
+    max_id = session.execute(select(func.max(model.id))).scalar() or 0
+    start = time.perf_counter()
+    updated = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = session.execute(
+            select(model.id)
+            .where(model.id > last_id, backfill.pending)
+            .order_by(model.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            # finished: a later run starts from the beginning again
+            _save_last_id(session, backfill.job_name, None)
+            session.commit()
+            break
+
+        result = session.execute(
+            update(model)
+            .where(model.id.in_(ids), backfill.pending)
+            .values(backfill.values)
+            .execution_options(synchronize_session=False)
+        )
+        last_id = ids[-1]
+        _save_last_id(session, backfill.job_name, last_id)
+        session.commit()
+
+        updated += result.rowcount
+        batches += 1
+        if on_batch:
+            on_batch(updated, last_id, max_id, updated / (time.perf_counter() - start))
+        if pause:
+            time.sleep(pause)
+    return updated
@@ -0,0 +1,49 @@
+from sqlalchemy import select, update, func
+
+from api.models import Payment
+from api.changes import execute_tracked, UPDATE
+
+"""
+Payment settlement.
+A payment is created as "pending" and moves to "settled" (or "failed").
+settle_pending_payments() is used by the "flask settle-payments" command.
+"""
+
+PENDING = "pending"
+SETTLED = "settled"
+FAILED = "failed"
+STATUSES = (PENDING, SETTLED, FAILED)
+
+
+def settle_pending_payments(session, batch_size=5000, limit=None, on_batch=None):
+    """
+    Settles pending payments in batches of batch_size ids.
+    Each batch is one keyset SELECT of ids (served by ix_payments_status_id)
+    plus one UPDATE ... WHERE id IN (...) AND status = 'pending', committed on its own,
+    so a crash only loses the current batch and concurrent runs never settle twice.
+    Returns the number of settled payments.
+    """
+    settled = 0
+    last_id = 0
+    while limit is None or settled < limit:
+        size = batch_size if limit is None else min(batch_size, limit - settled)
+        ids = session.execute(
+            select(Payment.id)
+            .where(Payment.status == PENDING, Payment.id > last_id)
+            .order_by(Payment.id)
+            .limit(size)
+        ).scalars().all()
+        if not ids:
+            break
+        changed = execute_tracked(
+            session, Payment,
+            update(Payment)
+            .where(Payment.id.in_(ids), Payment.status == PENDING)
+            .values(status=SETTLED, updated_at=func.current_date()),
+            UPDATE, {"status": SETTLED})
+        session.commit()
+        settled += len(changed)
+        last_id = ids[-1]
+        if on_batch:
+            on_batch(settled)
+    return settled
@@ -1,13 +1,29 @@
 # src/api/routes.py
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app, send_file, redirect
 from flask_cors import CORS
-from datetime import datetime
-
-from api.models import db, User, Task, Profile  # <-- asegúrate que Profile está en models.py
+import re
+from datetime import datetime, date
+from sqlalchemy import select, func, update, literal
+from sqlalchemy.orm import selectinload
+from sqlalchemy.exc import IntegrityError
+
+from api.models import db, User, Task, TaskArchive, Profile, TaskDealed, Payment, Dispute, ChangeEvent  # <-- asegúrate que Profile está en models.py
+from api.utils import APIException, TTLCache, MISSING
+from api.avatars import save_avatar, thumbnail_key, THUMBNAIL_SIZES, MIMETYPES
+from api.storage import get_storage
+from api.idempotency import idempotent
+from api.payments import PENDING, SETTLED, FAILED
+from api import disputes, db_routing, deletion
+from api.coalesce import task_reads
+from api.changes import execute_tracked, UPDATE
 
 api = Blueprint("api", __name__)
 CORS(api, supports_credentials=True)  # útil si el front envía cookies/credenciales
 
+# GET -> réplica (si hay), escrituras y read-your-writes -> primaria
+api.before_request(lambda: db_routing.use_replica_for(request))
+api.after_request(db_routing.mark_write)
+
 # =========================
 # HEALTH
 # =========================
@@ -16,11 +32,46 @@ def health():
     return jsonify({"msg": "Hello from Tasky API"}), 200
 
 
+# =========================
+# MULTI-GET (?ids=1,2,3)
+# =========================
+MAX_BATCH_IDS = 100
+
+
+def _parse_ids(raw):
+    """ "1,2,3" -> [1, 2, 3] (sin duplicados, en orden). ValueError si no es válido. """
+    ids = list(dict.fromkeys(int(x) for x in raw.split(",") if x.strip()))
+    if len(ids) > MAX_BATCH_IDS:
+        raise ValueError
+    return ids
+
+
+def _get_many(model, pk, ids):
+    # una sola query IN (...) en vez de un Query.get por id
+    if not ids:
+        return {}
+    return {getattr(o, pk.key): o for o in model.query.filter(pk.in_(ids)).all()}
+
+
+def _ids_arg():
+    try:
+        return _parse_ids(request.args["ids"])
+    except ValueError:
+        raise APIException(f"ids debe ser una lista de hasta {MAX_BATCH_IDS} enteros separados por comas")
+
+
 # =========================
 # USERS
 # =========================
 @api.get("/users")
 def get_users():
+    if "ids" in request.args:
+        try:
+            ids = _ids_arg()
+        except APIException as e:
+            return jsonify({"error": e.message}), e.status_code
+        found = _get_many(User, User.id, ids)
+        return jsonify([found[i].serialize() for i in ids if i in found]), 200
     users = User.query.all()
     return jsonify([u.serialize() for u in users]), 200
 
@@ -45,7 +96,8 @@ def create_user():
         username=data["username"]
     )
     db.session.add(u)
-    db.session.commit()
+    if not _commit_unique_user():
+        return jsonify({"error": "El email o el username ya están en uso"}), 409
     return jsonify(u.serialize()), 201
 
 
@@ -56,30 +108,173 @@ def update_user(user_id):
         return jsonify({"error": "Usuario no encontrado"}), 404
 
     data = request.get_json() or {}
+    old_key = u.username_lower
     u.email = data.get("email", u.email)
     u.username = data.get("username", u.username)
     u.password = data.get("password", u.password)  # TODO: hashear en prod
-    db.session.commit()
+    if not _commit_unique_user():
+        return jsonify({"error": "El email o el username ya están en uso"}), 409
+    username_cache.delete(old_key)
+    username_cache.delete(u.username_lower)
     return jsonify(u.serialize()), 200
 
 
+def _commit_unique_user():
+    # email/username_lower son únicos: "Ana" choca con "ana" aunque username no
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return False
+    return True
+
+
 @api.delete("/users/<int:user_id>")
 def delete_user(user_id):
-    u = User.query.get(user_id)
-    if not u:
+    # borrado en bloque (api/deletion.py): no carga tareas/mensajes en la sesión
+    username_lower = db.session.execute(
+        select(User.username_lower).where(User.id == user_id)).scalar()
+    if username_lower is None or not deletion.delete_user(db.session, user_id):
+        db.session.rollback()
         return jsonify({"error": "Usuario no encontrado"}), 404
-    db.session.delete(u)
     db.session.commit()
+    username_cache.delete(username_lower)
     return jsonify({"message": "Usuario eliminado"}), 200
 
 
+# username_lower -> user serializado, por worker. TTL corto: otro worker (o una
+# réplica con retraso) puede cambiar el usuario sin invalidar esta copia.
+# Los "no existe" no se cachean: un usuario recién creado se ve enseguida.
+username_cache = TTLCache(maxsize=2048, ttl=2)
+
+
 @api.get("/users/by-username/<string:username>")
 def get_user_by_username(username):
-    # .ilike hace búsqueda case-insensitive
-    u = User.query.filter(User.username.ilike(username)).first()
-    if not u:
+    # case-insensitive: point lookup sobre el índice único de username_lower
+    key = username.lower()
+    data = username_cache.get(key)
+    if data is MISSING:
+        u = User.query.filter(User.username_lower == key).first()
+        if u is None:
+            # filas que el backfill username-lower aún no rellenó (IS NULL usa el índice)
+            u = User.query.filter(User.username_lower.is_(None), func.lower(User.username) == key).first()
+        data = u.serialize() if u else None
+        if data is not None:
+            username_cache.set(key, data)
+    if data is None:
         return jsonify({"error": "Usuario no encontrado"}), 404
-    return jsonify(u.serialize()), 200
+    return jsonify(data), 200
+
+
+# =========================
+# USER TASKS (dashboard del publisher)
+# =========================
+def _parse_date(value):
+    return date.fromisoformat(value) if value else None
+
+
+def _days_between(start, end):
+    # diferencia en días entre dos columnas Date según el dialecto
+    if db.session.get_bind().dialect.name == "sqlite":
+        return func.julianday(end) - func.julianday(start)
+    return end - start  # postgres: date - date = integer (días)
+
+
+def _dashboard_filters(model, user_id, from_date, to_date):
+    # mismos filtros que el índice ix_task_publisher_status_posted
+    filters = [model.publisher_id == user_id]
+    if from_date:
+        filters.append(model.posted_at >= from_date)
+    if to_date:
+        filters.append(model.posted_at <= to_date)
+    return filters
+
+
+def _dashboard_summary(model, user_id, from_date, to_date):
+    """ (status, tareas, gasto, completadas, días hasta completar) de Task o TaskArchive. """
+    filters = _dashboard_filters(model, user_id, from_date, to_date)
+    # gasto por tarea (una fila por task) para no duplicar filas en el resumen;
+    # sólo pagos liquidados: pending/failed no son gasto
+    spend = (
+        select(TaskDealed.task_id, func.sum(Payment.amount).label("amount"))
+        .join(Payment, Payment.dealed_id == TaskDealed.id)
+        .join(model, model.id == TaskDealed.task_id)
+        .where(*filters, Payment.status == SETTLED)
+        .group_by(TaskDealed.task_id)
+        .subquery()
+    )
+    return db.session.execute(
+        select(
+            model.status,
+            func.count(model.id),
+            func.sum(spend.c.amount),
+            func.count(model.completed_at),
+            func.sum(_days_between(model.posted_at, model.completed_at)),
+        )
+        .outerjoin(spend, spend.c.task_id == model.id)
+        .where(*filters)
+        .group_by(model.status)
+    ).all()
+
+
+@api.get("/users/<int:user_id>/tasks")
+def get_tasks_by_user(user_id):
+    """
+    Tareas publicadas por el usuario (paginadas) + resumen para el dashboard.
+    Filtros: status, from_date, to_date (sobre posted_at, YYYY-MM-DD).
+    El resumen se calcula con una query agrupada por status en task y otra en
+    task_archive; la lista (y total) sólo incluye tareas activas.
+    """
+    status = request.args.get("status")
+    try:
+        from_date = _parse_date(request.args.get("from_date"))
+        to_date = _parse_date(request.args.get("to_date"))
+    except ValueError:
+        return jsonify({"error": "from_date y to_date deben tener formato YYYY-MM-DD"}), 400
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = min(max(request.args.get("per_page", 20, type=int), 1), 100)
+
+    # el resumen incluye las tareas archivadas (task_archive): es el historial
+    active = _dashboard_summary(Task, user_id, from_date, to_date)
+    archived = _dashboard_summary(TaskArchive, user_id, from_date, to_date)
+    # la lista sólo pagina tareas activas
+    active_by_status = {row[0]: row[1] for row in active}
+
+    by_status = {}
+    total_spend = 0.0
+    completed = 0
+    completion_days = 0.0
+    for row_status, count, amount, n_completed, days in active + archived:
+        by_status[row_status] = by_status.get(row_status, 0) + count
+        total_spend += float(amount or 0)
+        completed += n_completed
+        completion_days += float(days or 0)
+
+    filters = _dashboard_filters(Task, user_id, from_date, to_date)
+    tasks_q = Task.query.options(selectinload(Task.categories)).filter(*filters)
+    if status:
+        tasks_q = tasks_q.filter(Task.status == status)
+        total = active_by_status.get(status, 0)
+    else:
+        total = sum(active_by_status.values())
+    tasks = (
+        tasks_q.order_by(Task.posted_at.desc(), Task.id.desc())
+        .limit(per_page)
+        .offset((page - 1) * per_page)
+        .all()
+    )
+
+    return jsonify({
+        "tasks": [t.serialize_all_data() for t in tasks],
+        "page": page,
+        "per_page": per_page,
+        "total": total,
+        "summary": {
+            "by_status": by_status,
+            "total_spend": round(total_spend, 2),
+            "avg_completion_days": round(completion_days / completed, 2) if completed else None,
+        },
+    }), 200
 
 
 # =========================
@@ -93,55 +288,159 @@ def get_profile(user_id):
     return jsonify(prof.serialize()), 200
 
 
+@api.get("/profiles")
+def get_profiles():
+    """ Perfiles de varios usuarios: /api/profiles?ids=1,2,3 (ids = user_id). """
+    try:
+        ids = _ids_arg() if "ids" in request.args else []
+    except APIException as e:
+        return jsonify({"error": e.message}), e.status_code
+    if not ids:
+        return jsonify({"error": "ids es requerido"}), 400
+    found = _get_many(Profile, Profile.user_id, ids)
+    return jsonify([found[i].serialize() for i in ids if i in found]), 200
+
+
+PROFILE_FIELDS = ["name", "last_name", "avatar", "city", "birth_date", "bio", "skills", "rating_avg"]
+
+
+def _dialect_insert(model):
+    # INSERT con ON CONFLICT: postgres y sqlite tienen su propio insert()
+    if db.session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+
 @api.put("/users/<int:user_id>/profile")
 def update_profile(user_id):
     """
-    Crea o actualiza el perfil del usuario.
+    Crea o actualiza el perfil del usuario en un solo statement:
+    INSERT ... SELECT FROM user ... ON CONFLICT (user_id) DO UPDATE ... RETURNING.
     Si el perfil no existe, lo crea con valores por defecto para
-    las columnas NOT NULL (name, etc.).
+    las columnas NOT NULL (name, etc.); si existe, sólo cambia los campos recibidos.
+    Si el usuario no existe el SELECT no devuelve filas y no se inserta nada.
     """
     data = request.get_json() or {}
-
-    # por si quieres validar que el usuario existe
-    user = User.query.get(user_id)
-    if not user:
+    values = {f: data[f] for f in PROFILE_FIELDS if data.get(f) is not None}
+    try:
+        if "birth_date" in values:
+            values["birth_date"] = date.fromisoformat(values["birth_date"])
+        if "rating_avg" in values:
+            values["rating_avg"] = float(values["rating_avg"])
+    except (TypeError, ValueError):
+        return jsonify({"error": "birth_date debe ser YYYY-MM-DD y rating_avg un número"}), 400
+
+    now = datetime.utcnow()
+    cols = Profile.__table__.c
+    # fila a insertar si no existe: name por defecto = username
+    source = select(
+        User.id,
+        func.coalesce(literal(values.get("name"), cols.name.type), User.username),
+        literal(values.get("last_name", ""), cols.last_name.type),
+        literal(values.get("avatar", ""), cols.avatar.type),
+        literal(values.get("city", ""), cols.city.type),
+        literal(values.get("birth_date"), cols.birth_date.type),
+        literal(values.get("bio", ""), cols.bio.type),
+        literal(values.get("skills", ""), cols.skills.type),
+        literal(values.get("rating_avg", 0.0), cols.rating_avg.type),
+        literal(now, cols.created_at.type),
+        literal(now, cols.modified_at.type),
+    ).where(User.id == user_id)
+
+    stmt = _dialect_insert(Profile).from_select(
+        ["user_id"] + PROFILE_FIELDS + ["created_at", "modified_at"], source)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[cols.user_id],
+        set_={**{f: stmt.excluded[f] for f in values}, "modified_at": stmt.excluded.modified_at},
+    ).returning(*cols)
+
+    row = db.session.execute(stmt).first()
+    db.session.commit()
+    if row is None:
         return jsonify({"error": "Usuario no encontrado"}), 404
+    return jsonify(Profile(**row._asdict()).serialize()), 200
 
-    prof = Profile.query.get(user_id)  # PK = user_id
-    if not prof:
-        # ---- crear con DEFAULTS para NOT NULL ----
-        prof = Profile(
-            user_id=user_id,
-            # name es NOT NULL -> usa body o username o string vacío
-            name=(data.get("name") or user.username or ""),
-            # estas pueden ser NOT NULL en tu modelo; si lo son, ponles default
-            last_name=data.get("last_name") or "",
-            avatar=data.get("avatar") or "",
-            city=data.get("city") or "",
-            birth_date=data.get("birth_date"),  # si tu col no es NOT NULL, puede ir None
-            bio=data.get("bio") or "",
-            skills=data.get("skills") or "",
-            rating_avg=data.get("rating_avg") or 0.0,
-            created_at=datetime.utcnow(),
-            modified_at=datetime.utcnow(),
-        )
-        db.session.add(prof)
-    else:
-        # ---- actualizar sólo los campos recibidos ----
-        for field in ["name", "last_name", "avatar", "city", "birth_date", "bio", "skills", "rating_avg"]:
-            if field in data and data[field] is not None:
-                setattr(prof, field, data[field])
+# =========================
+# AVATARS
+# =========================
+AVATAR_CACHE_SECONDS = 365 * 24 * 3600  # keys son content-addressed => inmutables
+AVATAR_KEY_RE = re.compile(r"^[0-9a-f]{64}(_\d+)?\.(jpg|png|gif|webp)$")
+
+
+@api.post("/users/<int:user_id>/avatar")
+def upload_avatar(user_id):
+    """
+    Sube el avatar como cuerpo crudo de la petición (Content-Type: image/*).
+    El cuerpo se procesa en streaming, no se carga entero en memoria.
+    """
+    if not db.session.get(User, user_id):
+        return jsonify({"error": "Usuario no encontrado"}), 404
+    try:
+        key = save_avatar(request.stream, current_app)
+    except APIException as e:
+        return jsonify({"error": e.message}), e.status_code
+
+    url = f"/api/avatars/{key}"
+    prof = db.session.get(Profile, user_id)
+    if prof:
+        prof.avatar = url
         prof.modified_at = datetime.utcnow()
+        db.session.commit()
+
+    return jsonify({
+        "key": key,
+        "avatar": url,
+        "thumbnails": {size: f"/api/avatars/{thumbnail_key(key, size)}" for size in THUMBNAIL_SIZES},
+    }), 201
+
+
+@api.get("/avatars/<string:key>")
+def get_avatar(key):
+    storage = get_storage()
+    if not AVATAR_KEY_RE.match(key):
+        return jsonify({"error": "Avatar no encontrado"}), 404
+
+    remote = storage.url(key)
+    if remote:
+        # sin exists(): en Cloudinary es una llamada a la Admin API (con cuota).
+        # La key es content-addressed, si no existe el CDN ya responde 404
+        resp = redirect(remote, code=301)
+        resp.cache_control.public = True
+        resp.cache_control.max_age = AVATAR_CACHE_SECONDS
+        return resp
+
+    if not storage.exists(key):
+        return jsonify({"error": "Avatar no encontrado"}), 404
+    ext = key.rsplit(".", 1)[-1]
+    resp = send_file(storage.open(key), mimetype=MIMETYPES.get(ext, "application/octet-stream"),
+                     etag=key, max_age=AVATAR_CACHE_SECONDS, conditional=True)
+    resp.cache_control.public = True
+    resp.cache_control.immutable = True
+    return resp
 
-    db.session.commit()
-    return jsonify(prof.serialize()), 200
 
 # =========================
 # TASKS (mínimo viable)
 # =========================
 @api.get("/tasks")
+@task_reads.cached
 def list_tasks():
-    tasks = Task.query.all()
+    if "ids" in request.args:
+        try:
+            ids = _ids_arg()
+        except APIException as e:
+            return jsonify({"error": e.message}), e.status_code
+        found = _get_many(Task, Task.id, ids)
+        # igual que get_task: las que faltan pueden estar archivadas
+        found.update(_get_many(TaskArchive, TaskArchive.id, [i for i in ids if i not in found]))
+        return jsonify([found[i].serialize() for i in ids if i in found]), 200
+    q = Task.query
+    # ?status=pending para el feed: las vencidas ya están en "expired" (flask expire-tasks)
+    if request.args.get("status"):
+        q = q.filter(Task.status == request.args["status"])
+    tasks = q.all()
     return jsonify([t.serialize() for t in tasks]), 200
 
 
@@ -151,22 +450,31 @@ def create_task():
     if not data.get("title") or not data.get("description") or not data.get("publisher_id"):
         return jsonify({"error": "title, description, publisher_id son requeridos"}), 400
 
+    try:
+        due_at = datetime.fromisoformat(data["due_at"]) if data.get("due_at") else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "due_at debe tener formato ISO 8601"}), 400
+
     t = Task(
         title=data["title"],
         description=data["description"],
         publisher_id=data["publisher_id"],
         location=data.get("location"),
         price=data.get("price"),
+        due_at=due_at,
         status=data.get("status", "pending"),
     )
     db.session.add(t)
     db.session.commit()
+    task_reads.clear()
     return jsonify(t.serialize()), 201
 
 
 @api.get("/tasks/<int:task_id>")
+@task_reads.cached
 def get_task(task_id):
-    t = Task.query.get(task_id)
+    # las tareas antiguas pueden estar en task_archive (flask archive-tasks)
+    t = Task.query.get(task_id) or db.session.get(TaskArchive, task_id)
     if not t:
         return jsonify({"error": "Tarea no encontrada"}), 404
     return jsonify(t.serialize()), 200
@@ -174,9 +482,262 @@ def get_task(task_id):
 
 @api.delete("/tasks/<int:task_id>")
 def delete_task(task_id):
-    t = Task.query.get(task_id)
-    if not t:
+    # borra también ofertas, tratos, pagos y reseñas de la tarea (api/deletion.py)
+    if not deletion.delete_task(db.session, task_id):
+        db.session.rollback()
         return jsonify({"error": "Tarea no encontrada"}), 404
-    db.session.delete(t)
     db.session.commit()
+    task_reads.clear()
     return jsonify({"message": "Tarea eliminada"}), 200
+
+
+# =========================
+# PAYMENTS
+# (aceptan header Idempotency-Key; @idempotent hace el commit)
+# =========================
+@api.get("/payments/<int:payment_id>")
+def get_payment(payment_id):
+    p = db.session.get(Payment, payment_id)
+    if not p:
+        return jsonify({"error": "Pago no encontrado"}), 404
+    return jsonify(p.serialize()), 200
+
+
+@api.post("/payments")
+@idempotent
+def create_payment():
+    data = request.get_json() or {}
+    deal = db.session.get(TaskDealed, data.get("dealed_id")) if data.get("dealed_id") else None
+    if not deal:
+        return jsonify({"error": "dealed_id no existe"}), 404
+
+    amount = data.get("amount", deal.fixed_price)
+    try:
+        if amount is None or float(amount) <= 0:
+            raise ValueError
+    except (TypeError, ValueError):
+        return jsonify({"error": "amount debe ser un número positivo"}), 400
+
+    if Payment.query.filter_by(dealed_id=deal.id).first():
+        return jsonify({"error": "Este trato ya tiene un pago"}), 409
+
+    p = Payment(dealed_id=deal.id, amount=amount, status=PENDING)
+    db.session.add(p)
+    db.session.flush()
+    db.session.refresh(p)  # trae created_at/updated_at del server_default
+    return jsonify(p.serialize()), 201
+
+
+def _transition_payment(payment_id, new_status):
+    # UPDATE condicional: sólo un pending puede pasar a settled/failed
+    changed = execute_tracked(
+        db.session, Payment,
+        update(Payment)
+        .where(Payment.id == payment_id, Payment.status == PENDING)
+        .values(status=new_status, updated_at=func.current_date()),
+        UPDATE, {"status": new_status})
+    p = db.session.get(Payment, payment_id, populate_existing=True)
+    if not p:
+        return jsonify({"error": "Pago no encontrado"}), 404
+    if not changed:
+        return jsonify({"error": f"El pago está en estado {p.status}"}), 409
+    return jsonify(p.serialize()), 200
+
+
+@api.post("/payments/<int:payment_id>/settle")
+@idempotent
+def settle_payment(payment_id):
+    return _transition_payment(payment_id, SETTLED)
+
+
+@api.post("/payments/<int:payment_id>/fail")
+@idempotent
+def fail_payment(payment_id):
+    return _transition_payment(payment_id, FAILED)
+
+
+# =========================
+# DISPUTES + ADMIN QUEUE
+# =========================
+@api.post("/disputes")
+def create_dispute():
+    data = request.get_json() or {}
+    if not data.get("dealed_id") or not data.get("raised_by") or not data.get("reason") or not data.get("details"):
+        return jsonify({"error": "dealed_id, raised_by, reason y details son requeridos"}), 400
+    if not db.session.get(TaskDealed, data["dealed_id"]):
+        return jsonify({"error": "dealed_id no existe"}), 404
+    if Dispute.query.filter_by(dealed_id=data["dealed_id"]).first():
+        return jsonify({"error": "Este trato ya tiene una disputa"}), 409
+
+    now = datetime.utcnow()
+    d = Dispute(
+        dealed_id=data["dealed_id"],
+        raised_by=data["raised_by"],
+        reason=data["reason"],
+        details=data["details"],
+        status=disputes.OPEN,
+        created_at=now,
+        updated_at=now,
+    )
+    db.session.add(d)
+    db.session.commit()
+    return jsonify(d.serialize()), 201
+
+
+def _admin_id():
+    # HTTP Basic con el email/username y la contraseña de un usuario con rol admin
+    return disputes.authenticate_admin(request.authorization)
+
+
+@api.get("/admin/disputes")
+def list_dispute_queue():
+    """ Cola de disputas por antigüedad (usa ix_dispute_status_created). """
+    if not _admin_id():
+        return jsonify({"error": "Se requiere un admin"}), 403
+    status = request.args.get("status", disputes.OPEN)
+    limit = min(max(request.args.get("limit", 50, type=int), 1), 200)
+    q = Dispute.query.filter(Dispute.status == status)
+    if request.args.get("unclaimed") == "true":
+        q = q.filter(Dispute.claimed_by.is_(None))
+    items = q.order_by(Dispute.created_at, Dispute.id).limit(limit).all()
+    return jsonify([d.serialize() for d in items]), 200
+
+
+@api.post("/admin/disputes/claim")
+def claim_disputes():
+    admin_id = _admin_id()
+    if not admin_id:
+        return jsonify({"error": "Se requiere un admin"}), 403
+    try:
+        limit = min(max(int((request.get_json(silent=True) or {}).get("limit", 1)), 1), 50)
+    except (TypeError, ValueError):
+        return jsonify({"error": "limit debe ser un entero"}), 400
+    claimed = disputes.claim_disputes(admin_id, limit)
+    return jsonify([d.serialize() for d in claimed]), 200
+
+
+@api.post("/admin/disputes/<int:dispute_id>/release")
+def release_dispute(dispute_id):
+    admin_id = _admin_id()
+    if not admin_id:
+        return jsonify({"error": "Se requiere un admin"}), 403
+    d = db.session.get(Dispute, dispute_id)
+    if not d:
+        return jsonify({"error": "Disputa no encontrada"}), 404
+    if not disputes.release_dispute(d, admin_id):
+        return jsonify({"error": "La disputa no está reclamada por este admin"}), 409
+    return jsonify({"message": "Disputa liberada"}), 200
+
+
+@api.post("/admin/disputes/<int:dispute_id>/resolve")
+def resolve_dispute(dispute_id):
+    """ Body: resolution, status (resolved|rejected), action. """
+    admin_id = _admin_id()
+    if not admin_id:
+        return jsonify({"error": "Se requiere un admin"}), 403
+    data = request.get_json() or {}
+    status = data.get("status", disputes.RESOLVED)
+    if status not in disputes.CLOSED_STATUSES or not data.get("resolution"):
+        return jsonify({"error": "resolution y status (resolved|rejected) son requeridos"}), 400
+    d = db.session.get(Dispute, dispute_id)
+    if not d:
+        return jsonify({"error": "Disputa no encontrada"}), 404
+    if not disputes.close_dispute(d, admin_id, status, data["resolution"], data.get("action", status)):
+        return jsonify({"error": "La disputa no está abierta o no está reclamada por este admin"}), 409
+    return jsonify(d.serialize()), 200
+
+
+# =========================
+# EVENTS (change_events, ver api/changes.py)
+# El consumidor guarda el último offset y pide ?after=<offset>
+# =========================
+MAX_EVENTS = 1000
+
+
+@api.get("/events")
+def list_events():
+    try:
+        after = int(request.args.get("after", 0))
+        limit = int(request.args.get("limit", 100))
+    except ValueError:
+        return jsonify({"error": "after y limit deben ser enteros"}), 400
+    if not 1 <= limit <= MAX_EVENTS:
+        return jsonify({"error": f"limit debe estar entre 1 y {MAX_EVENTS}"}), 400
+
+    events = db.session.execute(
+        select(ChangeEvent)
+        .where(ChangeEvent.id > after)
+        .order_by(ChangeEvent.id)
+        .limit(limit)
+    ).scalars().all()
+    return jsonify({
+        "events": [e.serialize() for e in events],
+        "next_after": events[-1].id if events else after,
+    }), 200
+
+
+# =========================
+# BATCH (varias lecturas en una petición)
+# =========================
+# path de la sub-petición -> (modelo, pk, serializer, mensaje 404), igual que los GET individuales
+BATCH_ROUTES = (
+    (re.compile(r"^/api/tasks/(\d+)$"), Task, Task.id, Task.serialize, "Tarea no encontrada"),
+    (re.compile(r"^/api/users/(\d+)$"), User, User.id, User.serialize, "Usuario no encontrado"),
+    (re.compile(r"^/api/users/(\d+)/profile$"), Profile, Profile.user_id, Profile.serialize, "Perfil no encontrado"),
+)
+
+
+@api.post("/batch")
+def batch():
+    """
+    Body: {"requests": [{"path": "/api/tasks/1"}, {"path": "/api/users/2/profile"}, ...]}
+    Responde [{"path", "status", "body"}, ...] en el mismo orden.
+    Se hace una query IN (...) por tipo de recurso, no una por sub-petición.
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({"error": "El body debe ser un objeto JSON con requests"}), 400
+    subrequests = body.get("requests")
+    if not isinstance(subrequests, list) or len(subrequests) > MAX_BATCH_IDS:
+        return jsonify({"error": f"requests debe ser una lista de hasta {MAX_BATCH_IDS} elementos"}), 400
+
+    # 1) resolver cada path a (ruta, id)
+    matched = []
+    ids_by_route = {}
+    for sub in subrequests:
+        path = sub.get("path", "") if isinstance(sub, dict) else ""
+        if not isinstance(path, str):
+            # {"path": 5}, {"path": null}...: se responde como ruta no soportada
+            matched.append((path, None, None))
+            continue
+        path = path.split("?", 1)[0].rstrip("/")
+        for route in BATCH_ROUTES:
+            m = route[0].match(path)
+            if m:
+                matched.append((path, route, int(m.group(1))))
+                ids_by_route.setdefault(route, []).append(int(m.group(1)))
+                break
+        else:
+            matched.append((path, None, None))
+
+    # 2) una query por tipo de recurso
+    found = {route: _get_many(route[1], route[2], list(dict.fromkeys(ids)))
+             for route, ids in ids_by_route.items()}
+    for route, ids in ids_by_route.items():
+        if route[1] is Task:
+            # igual que get_task: las que faltan pueden estar archivadas
+            missing = [i for i in dict.fromkeys(ids) if i not in found[route]]
+            found[route].update(_get_many(TaskArchive, TaskArchive.id, missing))
+
+    # 3) armar respuestas en orden
+    responses = []
+    for path, route, obj_id in matched:
+        if route is None:
+            responses.append({"path": path, "status": 404, "body": {"error": "Ruta no soportada en batch"}})
+            continue
+        obj = found[route].get(obj_id)
+        if obj is None:
+            responses.append({"path": path, "status": 404, "body": {"error": route[4]}})
+        else:
+            responses.append({"path": path, "status": 200, "body": route[3](obj)})
+    return jsonify(responses), 200
@@ -0,0 +1,93 @@
+import os
+import shutil
+
+from flask import current_app
+
+"""
+Storage backends for uploaded files (avatars).
+Keys are content-addressed (sha256 of the file + extension), so a key that
+already exists never needs to be written again.
+Choose the backend with the AVATAR_STORAGE config value: "local" or "cloudinary".
+"""
+
+
+class LocalStorage:
+    """ Stores files in a local folder. Used in development and tests. """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, key)
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def put(self, key, src_path):
+        # src_path is a temp file we own: moving it is cheaper than copying
+        try:
+            os.replace(src_path, self.path(key))
+        except OSError:
+            shutil.move(src_path, self.path(key))
+
+    def open(self, key):
+        return open(self.path(key), "rb")
+
+    def url(self, key):
+        # served by our own endpoint (GET /api/avatars/<key>)
+        return None
+
+
+class CloudinaryStorage:
+    """ Stores files in Cloudinary, configured through the CLOUDINARY_URL env var. """
+
+    def __init__(self, folder="avatars"):
+        import cloudinary  # noqa: F401  (reads CLOUDINARY_URL)
+        self.folder = folder
+
+    def _public_id(self, key):
+        return f"{self.folder}/{os.path.splitext(key)[0]}"
+
+    def exists(self, key):
+        import cloudinary.api
+        try:
+            cloudinary.api.resource(self._public_id(key))
+            return True
+        except cloudinary.api.NotFound:
+            return False
+
+    def put(self, key, src_path):
+        import cloudinary.uploader
+        cloudinary.uploader.upload(
+            src_path, public_id=self._public_id(key), overwrite=False)
+        os.remove(src_path)
+
+    def open(self, key):
+        # normally get_avatar redirects to url(); this streams the file through us
+        import requests
+        resp = requests.get(self.url(key), stream=True, timeout=10)
+        resp.raise_for_status()
+        resp.raw.decode_content = True
+        return resp.raw
+
+    def url(self, key):
+        import cloudinary
+        return cloudinary.CloudinaryImage(self._public_id(key)).build_url(secure=True)
+
+
+def get_storage(app=None):
+    """ Returns the storage backend of the app, creating it on first use. """
+    app = app or current_app
+    storage = app.extensions.get("avatar_storage")
+    if storage is None:
+        kind = app.config.get("AVATAR_STORAGE", "local")
+        if kind == "cloudinary":
+            storage = CloudinaryStorage()
+        elif kind == "local":
+            storage = LocalStorage(app.config.get("AVATAR_LOCAL_DIR")
+                                   or os.path.join(app.instance_path, "avatars"))
+        else:
+            raise ValueError(f"Unknown AVATAR_STORAGE: {kind}")
+        app.extensions["avatar_storage"] = storage
+    return storage
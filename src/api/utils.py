@@ -1,3 +1,6 @@
+import threading
+import time
+from collections import OrderedDict
 from flask import jsonify, url_for
 
 class APIException(Exception):
@@ -15,6 +18,44 @@ class APIException(Exception):
         rv['message'] = self.message
         return rv
 
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Small in-process LRU cache with expiry, shared by the threads of a worker.
+    Values can be None (useful to remember "not found" answers).
+    """
+    def __init__(self, maxsize=1024, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                self._data.pop(key, None)
+                return default
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
 def has_no_empty_params(rule):
     defaults = rule.defaults if rule.defaults is not None else ()
     arguments = rule.arguments if rule.arguments is not None else ()
@@ -1,8 +1,37 @@
+import os
+import threading
 from flask import Flask
 from flask_cors import CORS
 from api.models import db
 from api.routes import api
-import os
+from api.frontend import setup_frontend, compress_json
+
+
+class LazyAdmin:
+    """
+    WSGI middleware que crea el admin (Flask-Admin + WTForms) recién
+    en la primera petición a /admin, así no lo paga cada arranque.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        self._admin_app = None
+        self._lock = threading.Lock()
+
+    def _get_admin_app(self):
+        if self._admin_app is None:
+            with self._lock:
+                if self._admin_app is None:
+                    from api.admin import create_admin_app
+                    self._admin_app = create_admin_app(self.app.config)
+        return self._admin_app
+
+    def __call__(self, environ, start_response):
+        if environ.get("PATH_INFO", "").startswith("/admin"):
+            return self._get_admin_app()(environ, start_response)
+        return self.wsgi_app(environ, start_response)
+
 
 def create_app():
     app = Flask(__name__)
@@ -16,6 +45,33 @@ def create_app():
     app.config["SQLALCHEMY_DATABASE_URI"] = db_uri
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
+    # Réplica de lectura opcional: los GET del API leen de aquí
+    replica_uri = os.getenv("REPLICA_DATABASE_URL")
+    if replica_uri:
+        app.config["SQLALCHEMY_BINDS"] = {"replica": replica_uri}
+    app.config["REPLICA_STICKY_SECONDS"] = int(os.getenv("REPLICA_STICKY_SECONDS", 5))
+
+    # Avatars: "local" (carpeta) o "cloudinary" (usa CLOUDINARY_URL)
+    app.config["AVATAR_STORAGE"] = os.getenv("AVATAR_STORAGE", "local")
+    app.config["AVATAR_LOCAL_DIR"] = os.getenv("AVATAR_LOCAL_DIR")
+    app.config["AVATAR_MAX_BYTES"] = int(os.getenv("AVATAR_MAX_BYTES", 5 * 1024 * 1024))
+
+    # Tareas completadas hace más de N días pasan a task_archive (flask archive-tasks)
+    app.config["TASK_ARCHIVE_AFTER_DAYS"] = int(os.getenv("TASK_ARCHIVE_AFTER_DAYS", 180))
+
+    # Snapshots columnares para reportes (flask export-analytics / analytics-report)
+    app.config["ANALYTICS_DIR"] = os.getenv("ANALYTICS_DIR")
+
+    # GET /api/tasks*: peticiones iguales y simultáneas comparten una sola consulta (api/coalesce.py)
+    app.config["READ_COALESCING"] = os.getenv("READ_COALESCING", "1") == "1"
+
+    # Frontend compilado (dist/) servido por Flask: un solo servicio en Render
+    app.config["FRONTEND_DIR"] = os.getenv("FRONTEND_DIR")
+    # ASGI (asgi.py): peticiones Flask simultáneas por worker, cada una en su hilo
+    app.config["ASGI_FLASK_THREADS"] = int(os.getenv("ASGI_FLASK_THREADS", 40))
+    # JSON más grande que esto se envía con gzip (0 = nunca)
+    app.config["COMPRESS_MIN_BYTES"] = int(os.getenv("COMPRESS_MIN_BYTES", 1024))
+
     db.init_app(app)
 
     # 🔧 CORS habilitado para todas las rutas del API
@@ -24,10 +80,25 @@ def create_app():
     # Blueprint
     app.register_blueprint(api, url_prefix="/api")
 
-    @app.route("/")
-    def root():
-        return "Tasky API OK. Revisa /api/*"
+    # Sólo para el CLI de flask (flask db ..., flask settle-payments, ...):
+    # alembic es la importación más pesada y el servidor web no la usa
+    if os.getenv("FLASK_RUN_FROM_CLI"):
+        from flask_migrate import Migrate
+        from api.commands import setup_commands
+        Migrate(app, db, compare_type=True)
+        setup_commands(app)
 
-    return app
+    # Admin en /admin (sólo con ADMIN_ENABLED=1), se construye en la primera visita
+    if os.getenv("ADMIN_ENABLED", "0") == "1":
+        app.wsgi_app = LazyAdmin(app)
+
+    app.after_request(compress_json)
 
-app = create_app()
\ No newline at end of file
+    if os.getenv("SERVE_FRONTEND") == "1":
+        setup_frontend(app)
+    else:
+        @app.route("/")
+        def root():
+            return "Tasky API OK. Revisa /api/*"
+
+    return app
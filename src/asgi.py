@@ -0,0 +1,12 @@
+"""
+ASGI entry point, alternative to wsgi.py for I/O-bound traffic:
+
+    $ uvicorn asgi:application --app-dir ./src/
+    $ gunicorn asgi:application -k uvicorn.workers.UvicornWorker --chdir ./src/
+
+See api/aio.py for what runs async and what is delegated to Flask.
+"""
+from app import create_app
+from api.aio import AsyncApi
+
+application = AsyncApi(create_app())
@@ -0,0 +1,21 @@
+# Gunicorn settings. gunicorn only reads ./gunicorn.conf.py of the directory it
+# is started from (before --chdir), so pass this file explicitly:
+#     gunicorn wsgi --chdir ./src/ --config src/gunicorn.conf.py
+# (Procfile and render.yaml already do).
+import os
+
+# Build the app once in the master and fork it: workers start faster and
+# share the imported code pages. Disable with GUNICORN_PRELOAD=0.
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared by the workers:
+    # drop the inherited pools (without closing the master's sockets).
+    if not server.cfg.preload_app:
+        return
+    from wsgi import application
+    from api.models import db
+    with application.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
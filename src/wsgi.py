@@ -1,7 +1,10 @@
 # This file was created to run the application on heroku using gunicorn.
 # Read more about it here: https://devcenter.heroku.com/articles/python-gunicorn
+# The app is only built here, not when app.py is imported (see gunicorn.conf.py).
 
-from app import app as application
+from app import create_app
+
+application = create_app()
 
 if __name__ == "__main__":
     application.run()
@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """ create_app() on throw-away SQLite files: make_app(replica=True) adds a replica bind. """
+    from app import create_app
+    from api.models import db
+    apps = []
+
+    def make(replica=False):
+        monkeypatch.setenv("SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'primary.db'}")
+        if replica:
+            monkeypatch.setenv("REPLICA_DATABASE_URL", f"sqlite:///{tmp_path / 'replica.db'}")
+        else:
+            monkeypatch.delenv("REPLICA_DATABASE_URL", raising=False)
+        monkeypatch.setenv("ADMIN_ENABLED", "0")
+        monkeypatch.setenv("READ_COALESCING", "0")
+        app = create_app()
+        with app.app_context():
+            for engine in db.engines.values():
+                db.metadata.create_all(engine)
+        apps.append(app)
+        return app
+
+    yield make
+    for app in apps:
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
@@ -0,0 +1,51 @@
+import asyncio
+import threading
+import time
+
+from flask import Flask, request
+
+from api.aio import WsgiInThreads
+
+
+def _call(app, body_parts):
+    scope = {"type": "http", "method": "POST", "path": "/slow", "query_string": b"",
+             "headers": [(b"content-type", b"text/plain")], "http_version": "1.1",
+             "scheme": "http", "server": ("testserver", 80), "root_path": ""}
+    messages = [{"type": "http.request", "body": part, "more_body": True} for part in body_parts]
+    messages[-1]["more_body"] = False
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        await app(scope, receive, send)
+        return sent[0]["status"], sent[1]["body"].decode()
+    return run()
+
+
+def test_flask_requests_run_on_separate_threads():
+    flask_app = Flask(__name__)
+
+    @flask_app.post("/slow")
+    def slow():
+        time.sleep(0.3)
+        return f"{threading.current_thread().name} {request.get_data(as_text=True)}"
+
+    app = WsgiInThreads(flask_app, max_threads=4)
+
+    async def main():
+        return await asyncio.gather(*[_call(app, [b"body", str(i).encode()]) for i in range(4)])
+
+    start = time.perf_counter()
+    responses = asyncio.run(main())
+    elapsed = time.perf_counter() - start
+    app.executor.shutdown()
+
+    assert elapsed < 0.9  # one shared thread would take 1.2s
+    assert [status for status, _ in responses] == [200] * 4
+    assert len({text.split()[0] for _, text in responses}) == 4
+    assert sorted(text.split()[1] for _, text in responses) == ["body0", "body1", "body2", "body3"]
@@ -0,0 +1,48 @@
+from datetime import date, timedelta
+
+from api import kpis
+from api.analytics import export_analytics
+from api.archive import archive_completed_tasks
+from api.models import db, User, Task, TaskOffered, TaskDealed, Payment, Category
+
+
+def _seed():
+    db.session.add_all([User(email="a@example.com", username="a", password="x"),
+                        User(email="b@example.com", username="b", password="x")])
+    db.session.flush()
+    task = Task(title="old", publisher_id=1, status="completed",
+                completed_at=date.today() - timedelta(days=400),
+                categories=[Category(name="garden")])
+    db.session.add(task)
+    db.session.flush()
+    offer = TaskOffered(task_id=task.id, tasker_id=2)
+    db.session.add(offer)
+    db.session.flush()
+    deal = TaskDealed(task_id=task.id, offer_id=offer.id, client_id=1, tasker_id=2, status="completed")
+    db.session.add(deal)
+    db.session.flush()
+    db.session.add(Payment(dealed_id=deal.id, amount=50, status="settled"))
+    db.session.commit()
+
+
+def test_archived_tasks_stay_in_the_snapshot(make_app, tmp_path):
+    app = make_app()
+    out = str(tmp_path / "snapshot")
+    with app.app_context():
+        _seed()
+        export_analytics(db.engine, out)
+        before = kpis.report(out)
+        assert before["gmv_by_category"] == {"garden": 50.0}
+        assert before["offer_conversion"]["task_conversion"] == 1.0
+
+        assert archive_completed_tasks(db.session) == 1
+        # incremental run: the archive "deletes" are moves, not tombstones
+        export_analytics(db.engine, out)
+        after = kpis.report(out)
+        assert after["gmv_by_category"] == before["gmv_by_category"]
+        assert after["offer_conversion"] == before["offer_conversion"]
+
+        export_analytics(db.engine, out, full=True)
+        full = kpis.report(out)
+        assert full["gmv_by_category"] == before["gmv_by_category"]
+        assert full["offer_conversion"] == before["offer_conversion"]
@@ -0,0 +1,39 @@
+from datetime import date, timedelta
+
+from api.archive import archive_completed_tasks
+from api.models import db, User, Task, TaskOffered, TaskDealed, Payment
+
+
+def test_summary_keeps_archived_tasks(make_app):
+    app = make_app()
+    with app.app_context():
+        db.session.add_all([User(email="a@example.com", username="a", password="x"),
+                            User(email="b@example.com", username="b", password="x")])
+        db.session.flush()
+        posted = date.today() - timedelta(days=410)
+        task = Task(title="old", publisher_id=1, status="completed",
+                    posted_at=posted, completed_at=posted + timedelta(days=10))
+        db.session.add_all([task, Task(title="new", publisher_id=1, status="pending")])
+        db.session.flush()
+        offer = TaskOffered(task_id=task.id, tasker_id=2)
+        db.session.add(offer)
+        db.session.flush()
+        deal = TaskDealed(task_id=task.id, offer_id=offer.id, client_id=1, tasker_id=2, status="completed")
+        db.session.add(deal)
+        db.session.flush()
+        db.session.add_all([Payment(dealed_id=deal.id, amount=10, status="settled")])
+        db.session.commit()
+
+    client = app.test_client()
+    before = client.get("/api/users/1/tasks").get_json()
+    assert before["summary"] == {"by_status": {"completed": 1, "pending": 1},
+                                 "total_spend": 10.0, "avg_completion_days": 10.0}
+
+    with app.app_context():
+        assert archive_completed_tasks(db.session) == 1
+
+    after = client.get("/api/users/1/tasks").get_json()
+    assert after["summary"] == before["summary"]
+    # the list only pages active tasks
+    assert after["total"] == 1
+    assert [t["title"] for t in after["tasks"]] == ["new"]
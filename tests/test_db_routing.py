@@ -0,0 +1,49 @@
+from sqlalchemy import insert, select
+
+from api.db_routing import REPLICA_BIND, STICKY_COOKIE
+from api.models import db, User
+
+
+def _seed(engine, username):
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__).values(
+            id=1, email=f"{username}@example.com", username=username,
+            username_lower=username, password="x"))
+
+
+def _usernames(engine):
+    with engine.connect() as conn:
+        return conn.execute(select(User.username).order_by(User.id)).scalars().all()
+
+
+def test_get_reads_from_the_replica(make_app):
+    app = make_app(replica=True)
+    with app.app_context():
+        _seed(db.engines[None], "primary")
+        _seed(db.engines[REPLICA_BIND], "replica")
+
+    resp = app.test_client().get("/api/users/1")
+    assert resp.status_code == 200
+    assert resp.get_json()["username"] == "replica"
+
+
+def test_write_goes_to_the_primary_and_pins_the_next_get(make_app):
+    app = make_app(replica=True)
+    with app.app_context():
+        _seed(db.engines[None], "primary")
+        _seed(db.engines[REPLICA_BIND], "replica")
+    client = app.test_client()
+
+    resp = client.post("/api/users", json={"email": "new@example.com", "password": "x", "username": "new"})
+    assert resp.status_code == 201
+    with app.app_context():
+        assert _usernames(db.engines[None]) == ["primary", "new"]
+        assert _usernames(db.engines[REPLICA_BIND]) == ["replica"]
+
+    # the test client sends the cookie back: read-your-writes from the primary
+    assert client.get_cookie(STICKY_COOKIE) is not None
+    resp = client.get("/api/users/1")
+    assert resp.get_json()["username"] == "primary"
+
+    client.delete_cookie(STICKY_COOKIE)
+    assert client.get("/api/users/1").get_json()["username"] == "replica"
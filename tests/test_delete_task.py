@@ -0,0 +1,45 @@
+from datetime import date, timedelta
+
+from sqlalchemy import func, select
+
+from api.archive import archive_completed_tasks
+from api.models import (db, User, Task, TaskArchive, TaskOffered, TaskOfferedArchive,
+                        TaskDealed, ChangeEvent)
+
+
+def _count(model):
+    return db.session.execute(select(func.count()).select_from(model)).scalar()
+
+
+def test_delete_archived_task(make_app):
+    app = make_app()
+    with app.app_context():
+        db.session.add_all([User(email="a@example.com", username="a", password="x"),
+                            User(email="b@example.com", username="b", password="x")])
+        db.session.flush()
+        task = Task(title="old", publisher_id=1, status="completed",
+                    completed_at=date.today() - timedelta(days=400))
+        db.session.add(task)
+        db.session.flush()
+        offer = TaskOffered(task_id=task.id, tasker_id=2)
+        db.session.add(offer)
+        db.session.flush()
+        db.session.add(TaskDealed(task_id=task.id, offer_id=offer.id, client_id=1, tasker_id=2,
+                                  status="completed"))
+        db.session.commit()
+        task_id = task.id
+        assert archive_completed_tasks(db.session) == 1
+
+    client = app.test_client()
+    assert client.delete(f"/api/tasks/{task_id}").status_code == 200
+    assert client.delete(f"/api/tasks/{task_id}").status_code == 404
+    assert client.get(f"/api/tasks/{task_id}").status_code == 404
+
+    with app.app_context():
+        assert _count(TaskArchive) == 0
+        assert _count(TaskOfferedArchive) == 0
+        assert _count(TaskDealed) == 0
+        last = db.session.execute(
+            select(ChangeEvent).where(ChangeEvent.entity == "task").order_by(ChangeEvent.id.desc())
+        ).scalars().first()
+        assert (last.entity_id, last.op, last.data) == (task_id, "delete", None)
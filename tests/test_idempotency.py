@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from api.idempotency import purge_expired_keys
+from api.models import db, User, Task, TaskOffered, TaskDealed, Payment, IdempotencyKey
+
+
+def _seed_payments():
+    db.session.add_all([User(email="a@example.com", username="a", password="x"),
+                        User(email="b@example.com", username="b", password="x")])
+    db.session.flush()
+    for i in range(2):
+        task = Task(title=f"t{i}", publisher_id=1)
+        db.session.add(task)
+        db.session.flush()
+        offer = TaskOffered(task_id=task.id, tasker_id=2)
+        db.session.add(offer)
+        db.session.flush()
+        deal = TaskDealed(task_id=task.id, offer_id=offer.id, client_id=1, tasker_id=2, status="accepted")
+        db.session.add(deal)
+        db.session.flush()
+        db.session.add(Payment(dealed_id=deal.id, amount=10, status="pending"))
+    db.session.commit()
+
+
+def test_same_key_on_another_path_is_rejected(make_app):
+    app = make_app()
+    with app.app_context():
+        _seed_payments()
+    client = app.test_client()
+    headers = {"Idempotency-Key": "k1"}
+
+    first = client.post("/api/payments/1/settle", headers=headers)
+    assert first.status_code == 200
+    retry = client.post("/api/payments/1/settle", headers=headers)
+    assert retry.status_code == 200
+    assert retry.headers["Idempotent-Replayed"] == "true"
+
+    other = client.post("/api/payments/2/settle", headers=headers)
+    assert other.status_code == 422
+    with app.app_context():
+        assert db.session.get(Payment, 2).status == "pending"
+
+
+def test_purge_expired_keys(make_app):
+    app = make_app()
+    with app.app_context():
+        now = datetime.utcnow()
+        db.session.add_all([
+            IdempotencyKey(key=f"k{i}", endpoint="api.create_payment", request_hash="h",
+                           response_status=201, response_body="{}", created_at=created_at)
+            for i, created_at in enumerate([now - timedelta(days=2), now - timedelta(days=3), now])])
+        db.session.commit()
+
+        assert purge_expired_keys(db.session, batch_size=1) == 2
+        assert db.session.execute(select(func.count()).select_from(IdempotencyKey)).scalar() == 1
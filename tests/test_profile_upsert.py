@@ -0,0 +1,42 @@
+import threading
+
+from sqlalchemy import func, select
+
+from api.models import db, User, Profile
+
+THREADS = 8
+
+
+def test_concurrent_first_writes_create_one_profile(make_app):
+    app = make_app()
+    with app.app_context():
+        db.session.add(User(email="ana@example.com", username="ana", password="x"))
+        db.session.commit()
+
+    barrier = threading.Barrier(THREADS)
+    statuses = []
+
+    def write(i):
+        client = app.test_client()
+        barrier.wait()
+        resp = client.put("/api/users/1/profile", json={"city": f"city {i}"})
+        statuses.append(resp.status_code)
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert statuses == [200] * THREADS
+    with app.app_context():
+        assert db.session.execute(select(func.count()).select_from(Profile)).scalar() == 1
+        profile = db.session.execute(select(Profile)).scalar_one()
+        assert profile.name == "ana"
+        assert profile.city.startswith("city ")
+
+
+def test_unknown_user_gets_404(make_app):
+    app = make_app()
+    resp = app.test_client().put("/api/users/99/profile", json={"city": "x"})
+    assert resp.status_code == 404
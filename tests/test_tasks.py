@@ -0,0 +1,57 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from api.archive import archive_completed_tasks
+from api.models import db, User, Task, TaskOffered, TaskDealed, Review
+
+
+def test_multi_get_includes_archived_tasks(make_app):
+    app = make_app()
+    with app.app_context():
+        db.session.add(User(email="a@example.com", username="a", password="x"))
+        db.session.flush()
+        db.session.add_all([
+            Task(title="old", publisher_id=1, status="completed",
+                 completed_at=date.today() - timedelta(days=400)),
+            Task(title="new", publisher_id=1, status="pending")])
+        db.session.commit()
+        assert archive_completed_tasks(db.session) == 1
+
+    resp = app.test_client().get("/api/tasks?ids=2,1,3")
+    assert resp.status_code == 200
+    assert [t["title"] for t in resp.get_json()] == ["new", "old"]
+
+
+def test_deal_must_reference_an_existing_task(make_app):
+    app = make_app()
+    with app.app_context():
+        db.session.add_all([User(email="a@example.com", username="a", password="x"),
+                            User(email="b@example.com", username="b", password="x")])
+        db.session.flush()
+        task = Task(title="old", publisher_id=1, status="completed",
+                    completed_at=date.today() - timedelta(days=400))
+        db.session.add(task)
+        db.session.flush()
+        offer = TaskOffered(task_id=task.id, tasker_id=2)
+        db.session.add(offer)
+        db.session.commit()
+        task_id, offer_id = task.id, offer.id
+
+        db.session.add(TaskDealed(task_id=99, offer_id=offer_id, client_id=1, tasker_id=2, status="x"))
+        with pytest.raises(IntegrityError):
+            db.session.flush()
+        db.session.rollback()
+
+        # archived task and offer are valid references
+        assert archive_completed_tasks(db.session) == 1
+        deal = TaskDealed(task_id=task_id, offer_id=offer_id, client_id=1, tasker_id=2, status="x")
+        db.session.add(deal)
+        db.session.flush()
+        db.session.add(Review(rate=5, publisher_id=1, worker_id=2, task_dealed_id=deal.id, task_id=task_id))
+        db.session.commit()
+
+        deal.offer_id = 99
+        with pytest.raises(IntegrityError):
+            db.session.commit()